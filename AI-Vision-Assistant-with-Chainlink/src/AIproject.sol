@@ -18,10 +18,19 @@ contract AIVisionNFT is VRFConsumerBaseV2Plus, ERC721URIStorage {
     uint16 public requestConfirmations;
     uint32 public numWords;
     
+    // Batch minting: one VRF request and callback for many tokens.
+    // The usable batch size is bounded by maxBatchSize(), which also keeps
+    // the callback gas within the coordinator's MAX_CALLBACK_GAS
+    uint256 public constant MAX_BATCH_SIZE = 20;
+    uint32 public constant BATCH_GAS_PER_TOKEN = 200000;
+    uint32 public constant MAX_CALLBACK_GAS = 2500000;
+    
     // NFT Tracking
     mapping(uint256 => address) public s_requestIdToSender;
     mapping(uint256 => string) public s_requestIdToTokenURI;
     mapping(uint256 => uint256) public s_requestIdToTokenId;
+    mapping(uint256 => uint256) public s_requestIdToTokenCount;
+    mapping(uint256 => string[]) private s_requestIdToTokenURIs;
     mapping(address => string) public userToFaceHash;
     
     // Events
@@ -79,28 +88,89 @@ contract AIVisionNFT is VRFConsumerBaseV2Plus, ERC721URIStorage {
         return requestId;
     }
 
+    function requestNFTBatch(string[] calldata tokenURIs) external returns (uint256 requestId) {
+        require(isUserRegistered(msg.sender), "User not registered");
+        require(tokenURIs.length > 0 && tokenURIs.length <= maxBatchSize(), "Invalid batch size");
+        
+        // The callback mints every token, so its gas grows with the batch
+        uint32 batchGasLimit = callbackGasLimit + uint32(tokenURIs.length - 1) * BATCH_GAS_PER_TOKEN;
+        
+        VRFV2PlusClient.RandomWordsRequest memory req = VRFV2PlusClient.RandomWordsRequest({
+            keyHash: keyHash,
+            subId: s_subscriptionId,
+            requestConfirmations: requestConfirmations,
+            callbackGasLimit: batchGasLimit,
+            numWords: numWords,
+            extraArgs: VRFV2PlusClient._argsToBytes(
+                VRFV2PlusClient.ExtraArgsV1({nativePayment: false})
+            )
+        });
+        
+        requestId = s_vrfCoordinator.requestRandomWords(req);
+        s_requestIdToSender[requestId] = msg.sender;
+        for (uint256 i = 0; i < tokenURIs.length; i++) {
+            s_requestIdToTokenURIs[requestId].push(tokenURIs[i]);
+        }
+        
+        emit NFTRequested(requestId, msg.sender);
+        return requestId;
+    }
+
+    // Largest batch whose callback gas stays within MAX_CALLBACK_GAS
+    function maxBatchSize() public view returns (uint256) {
+        if (callbackGasLimit > MAX_CALLBACK_GAS) {
+            return 0;
+        }
+        uint256 size = 1 + (MAX_CALLBACK_GAS - callbackGasLimit) / BATCH_GAS_PER_TOKEN;
+        return size < MAX_BATCH_SIZE ? size : MAX_BATCH_SIZE;
+    }
+
     // FIXED: Changed 'memory' to 'calldata' to match the base function signature
     function fulfillRandomWords(
         uint256 requestId,
         uint256[] calldata randomWords
     ) internal override {
         address nftOwner = s_requestIdToSender[requestId];
-        string memory tokenURI = s_requestIdToTokenURI[requestId];
+        string[] storage batchURIs = s_requestIdToTokenURIs[requestId];
         
+        if (batchURIs.length == 0) {
+            string memory tokenURI = s_requestIdToTokenURI[requestId];
+            s_requestIdToTokenId[requestId] = _mintToken(nftOwner, tokenURI);
+            s_requestIdToTokenCount[requestId] = 1;
+            return;
+        }
+        
+        // Batch: consecutive token ids, the first one recorded for the request
+        s_requestIdToTokenId[requestId] = _tokenIds.current() + 1;
+        s_requestIdToTokenCount[requestId] = batchURIs.length;
+        for (uint256 i = 0; i < batchURIs.length; i++) {
+            _mintToken(nftOwner, batchURIs[i]);
+        }
+    }
+
+    function _mintToken(address nftOwner, string memory tokenURI) private returns (uint256) {
         _tokenIds.increment();
         uint256 newTokenId = _tokenIds.current();
         
         _safeMint(nftOwner, newTokenId);
         _setTokenURI(newTokenId, tokenURI);
         
-        s_requestIdToTokenId[requestId] = newTokenId;
         emit NFTMinted(newTokenId, nftOwner);
+        return newTokenId;
     }
 
     function getTokenIdByRequest(uint256 requestId) public view returns (uint256) {
         return s_requestIdToTokenId[requestId];
     }
 
+    function getTokenIdsByRequest(uint256 requestId) public view returns (uint256[] memory tokenIds) {
+        uint256 firstTokenId = s_requestIdToTokenId[requestId];
+        tokenIds = new uint256[](s_requestIdToTokenCount[requestId]);
+        for (uint256 i = 0; i < tokenIds.length; i++) {
+            tokenIds[i] = firstTokenId + i;
+        }
+    }
+
     function getUserFaceHash(address user) public view returns (string memory) {
         return userToFaceHash[user];
     }
@@ -17,7 +17,7 @@ class ArtGenerator:
         """Generate high-quality pencil sketch"""
         try:
             face_img = cv2.resize(face_img, (400, 400))
-            gray = cv2.c極vtColor(face_img, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
             inverted = 255 - gray
             blurred = cv2.GaussianBlur(inverted, (21, 21), 0)
             
@@ -0,0 +1,199 @@
+"""Headless batch mode: run the vision pipeline over video files and image folders.
+
+Streams one JSON line per processed frame (identities, distances, object
+boxes) and finishes with a throughput summary on stderr. No Tk required.
+Face track ids are only written for video frames processed in order
+(--workers 1), with a fresh tracker per video.
+
+    python batch.py footage.mp4 --stride 5 --workers 4 --output results.jsonl
+    python batch.py "archive/**/*.jpg" --annotate-video review.mp4
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+from tracker import FaceTracker
+from scheduler import DetectionScheduler
+from vision_processing import VisionProcessor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v')
+
+def expand_inputs(inputs):
+    """Resolve files, directories and glob patterns into an ordered list of paths"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in sorted(files))
+        elif os.path.exists(item):
+            paths.append(item)
+        else:
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+    return [p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS)]
+
+def iter_frames(paths, stride):
+    """Yield (source, frame_index, timestamp_ms, frame) for every stride-th frame"""
+    for path in paths:
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield path, 0, None, frame
+            continue
+        
+        cap = cv2.VideoCapture(path)
+        index = 0
+        try:
+            while True:
+                # grab() skips decoding for frames the stride throws away
+                if not cap.grab():
+                    break
+                if index % stride == 0:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        yield path, index, cap.get(cv2.CAP_PROP_POS_MSEC), frame
+                index += 1
+        finally:
+            cap.release()
+
+def face_record(face, with_track):
+    record = {
+        "box": list(face["box"]),
+        "name": face["name"],
+        "distance": face["distance"],
+        "candidates": [[name, distance] for name, distance in face["candidates"]],
+    }
+    if with_track:
+        record["track_id"] = face["track_id"]
+    return record
+
+def frame_record(source, frame_index, timestamp_ms, result, with_tracks=False):
+    return {
+        "source": source,
+        "frame": frame_index,
+        "timestamp_ms": timestamp_ms,
+        "faces": [face_record(face, with_tracks) for face in result.faces],
+        "objects": [
+            {
+                "box": list(obj["box"]),
+                "label": obj["label"],
+                "confidence": obj["confidence"],
+                "class_id": obj["class_id"],
+            }
+            for obj in result.objects
+        ],
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run face recognition + YOLO over recorded footage")
+    parser.add_argument("inputs", nargs="+", help="video files, image directories or glob patterns")
+    parser.add_argument("--stride", type=int, default=1, help="process every Nth video frame")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="face analysis processes and concurrent frames")
+    parser.add_argument("--output", default="-", help="JSONL destination (default: stdout)")
+    parser.add_argument("--annotate-video", help="write annotated frames to this video file")
+    parser.add_argument("--fps", type=float, default=None, help="annotated video frame rate")
+    parser.add_argument("--reuse-tracks", action="store_true",
+                        help="reuse encodings across frames of a track (single worker only)")
+    parser.add_argument("--yolo-batch", type=int, default=None,
+                        help="max frames per YOLO call (default: --workers)")
+    parser.add_argument("--metrics", help="write per-stage latency percentiles to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No images or videos matched the given inputs", file=sys.stderr)
+        return 1
+    
+    log = lambda msg: print(msg, file=sys.stderr)
+    # Concurrent frames share YOLO calls through the batcher
+    vision = VisionProcessor(log, face_workers=args.workers, yolo_batch=args.yolo_batch or args.workers)
+    # Offline output must describe every frame on its own: YOLO runs on every
+    # frame and, unless asked otherwise, every face is re-encoded
+    vision.detection_scheduler = DetectionScheduler(mode="every_frame")
+    # Tracks only mean something along one video whose frames run in order
+    tracked = args.workers == 1
+    reuse_tracks = args.reuse_tracks and tracked
+    
+    def new_tracker():
+        return FaceTracker() if reuse_tracks else FaceTracker(reverify_interval=0, uncertain_interval=0)
+    
+    vision.tracker = new_tracker()
+    current_source = None
+    
+    def process(item):
+        nonlocal current_source
+        source, _, _, frame = item
+        if tracked and source != current_source:
+            # Never chain track ids across files
+            current_source = source
+            vision.tracker = new_tracker()
+        return vision.process_frame(frame, True)
+    
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    writer = None
+    writer_size = None
+    frames = faces = objects = 0
+    started = time.perf_counter()
+    
+    def emit(item, future):
+        nonlocal writer, writer_size, frames, faces, objects
+        source, frame_index, timestamp_ms, frame = item
+        result = future.result()
+        with_tracks = tracked and timestamp_ms is not None
+        out.write(json.dumps(frame_record(source, frame_index, timestamp_ms, result, with_tracks)) + "\n")
+        frames += 1
+        faces += len(result.faces)
+        objects += len(result.detections)
+        
+        if args.annotate_video:
+            annotated = result.display_frame
+            if writer is None:
+                height, width = annotated.shape[:2]
+                fps = args.fps or 30.0 / args.stride
+                writer_size = (width, height)
+                writer = cv2.VideoWriter(args.annotate_video, cv2.VideoWriter_fourcc(*"mp4v"), fps, writer_size)
+            if annotated.shape[1::-1] != writer_size:
+                annotated = cv2.resize(annotated, writer_size)
+            writer.write(annotated)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            pending = deque()
+            for item in iter_frames(paths, max(1, args.stride)):
+                future = executor.submit(process, item)
+                pending.append((item, future))
+                # Bounded look-ahead keeps memory flat and output in input order
+                while len(pending) > 2 * args.workers:
+                    emit(*pending.popleft())
+            while pending:
+                emit(*pending.popleft())
+    finally:
+        if writer is not None:
+            writer.release()
+        if out is not sys.stdout:
+            out.close()
+        vision.shutdown()
+    
+    elapsed = time.perf_counter() - started
+    log(
+        f"📊 Processed {frames} frames from {len(paths)} inputs in {elapsed:.1f}s "
+        f"({frames / max(elapsed, 1e-9):.1f} fps) - {faces} faces, {objects} objects"
+    )
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(vision.metrics.to_json())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Offline benchmark for the perception and art stages.
+
+Times each stage separately on CPU with no camera, Tk window, network or
+blockchain, and writes a JSON report so runs from different commits can
+be diffed:
+
+    python benchmark.py --output bench_before.json
+    python benchmark.py --iterations 50 --stages hog_detect,encode,match
+    python benchmark.py --stages yolo --compare-backends pytorch,onnx,onnx:int8,openvino:int8
+"""
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+import cv2
+import numpy as np
+import face_recognition
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+from face import FaceGallery
+from gui import FrameConverter
+from art_generation import ArtGenerator
+from constants import FACE_MATCH_TOLERANCE
+from detections import DETECTION_DTYPE
+from detector import compare_backends
+from vision_processing import VisionProcessor, FrameResult
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DIRS = [os.path.join(REPO_ROOT, "saved_art"), os.path.join(REPO_ROOT, "screenshots")]
+FRAME_SIZE = (960, 540)
+
+STAGES = [
+    "hog_detect", "encode", "match", "yolo", "draw", "gui_conversion",
+    "pencil_sketch", "pixel_art", "face_hash", "load_known_faces",
+]
+
+def load_frames(count=8):
+    """Sample images from the repo resized to camera resolution, or synthetic frames"""
+    paths = []
+    for directory in SAMPLE_DIRS:
+        for pattern in ("*.jpg", "*.jpeg", "*.png"):
+            paths.extend(sorted(glob.glob(os.path.join(directory, pattern))))
+    frames = []
+    for path in paths[:count]:
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append(cv2.resize(image, FRAME_SIZE))
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+                  for _ in range(count)]
+    return paths[:len(frames)], frames
+
+def center_crop(frame, size=200):
+    height, width = frame.shape[:2]
+    top, left = (height - size) // 2, (width - size) // 2
+    return frame[top:top + size, left:left + size].copy()
+
+def time_stage(func, inputs, iterations, warmup=2):
+    """Call func on inputs round-robin and return per-call seconds"""
+    for i in range(min(warmup, iterations)):
+        func(inputs[i % len(inputs)])
+    samples = []
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def summarize(samples):
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {
+        "n": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "min_ms": round(float(ms.min()), 4),
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def synthetic_result(frame, faces=3, objects=5):
+    """FrameResult with a typical number of boxes for the drawing benchmark"""
+    height, width = frame.shape[:2]
+    result = FrameResult(frame)
+    for i in range(faces):
+        left = 40 + i * 220
+        result.faces.append({
+            "box": (120, left + 160, 320, left), "track_id": i, "encoding": None,
+            "name": f"person_{i}" if i else "Unknown", "distance": 0.35 if i else None,
+            "candidates": [],
+        })
+    result.detections = np.array([
+        ((30 + i * 150, 360, min(width - 1, 150 + i * 150), min(height - 1, 510)), 0.8, 0)
+        for i in range(objects)
+    ], dtype=DETECTION_DTYPE)
+    result.labels = {0: "person"}
+    return result
+
+def bench_load_known_faces(vision, image_paths, iterations):
+    """Cold (no encoding cache) vs warm (cache hit) gallery load over a temp copy"""
+    workdir = tempfile.mkdtemp(prefix="bench_faces_")
+    try:
+        for i, path in enumerate(image_paths):
+            shutil.copy(path, os.path.join(workdir, f"face_{i}{os.path.splitext(path)[1]}"))
+        vision.known_faces_dir = workdir
+        cache_path = os.path.join(workdir, os.path.basename(vision.encoding_cache.path))
+        
+        cold, warm = [], []
+        for _ in range(max(1, iterations // 10)):
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            vision.encoding_cache = type(vision.encoding_cache)(cache_path)
+            started = time.perf_counter()
+            vision.load_known_faces()
+            cold.append(time.perf_counter() - started)
+            
+            vision.encoding_cache = type(vision.encoding_cache)(cache_path)
+            started = time.perf_counter()
+            vision.load_known_faces()
+            warm.append(time.perf_counter() - started)
+        return {"cold": summarize(cold), "warm": summarize(warm), "images": len(image_paths)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run(args):
+    quiet = lambda msg: None
+    paths, frames = load_frames()
+    small_frames = [cv2.resize(frame, (0, 0), fx=0.5, fy=0.5) for frame in frames]
+    rgb_small = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in small_frames]
+    crops = [center_crop(frame) for frame in frames]
+    stages = [s.strip() for s in args.stages.split(",")] if args.stages else STAGES
+    iterations = args.iterations
+    
+    # In-process analysis so each stage is timed on its own, not through the pool
+    workdir = tempfile.mkdtemp(prefix="bench_vision_")
+    vision = VisionProcessor(quiet, face_workers=0, known_faces_dir=workdir)
+    art = ArtGenerator(quiet)
+    report = {}
+    
+    try:
+        if "hog_detect" in stages:
+            report["hog_detect"] = summarize(time_stage(
+                lambda rgb: face_recognition.face_locations(rgb, model="hog", number_of_times_to_upsample=1),
+                rgb_small, iterations
+            ))
+        
+        if "encode" in stages:
+            # Fixed face-sized box so the cost is measured even when samples contain no faces
+            height, width = rgb_small[0].shape[:2]
+            box = [(height // 4, width // 2 + 60, height // 4 + 120, width // 2 - 60)]
+            report["encode"] = summarize(time_stage(
+                lambda rgb: face_recognition.face_encodings(rgb, box), rgb_small, iterations
+            ))
+        
+        if "match" in stages:
+            rng = np.random.default_rng(0)
+            queries = [rng.normal(0, 0.1, (3, 128)).astype(np.float32) for _ in range(8)]
+            report["match"] = {}
+            for size in [int(s) for s in args.gallery_sizes.split(",")]:
+                gallery = FaceGallery()
+                gallery.reset(rng.normal(0, 0.1, (size, 128)).astype(np.float32),
+                              [f"id_{i}" for i in range(size)])
+                report["match"][str(size)] = summarize(time_stage(
+                    lambda q: gallery.match(q, tolerance=FACE_MATCH_TOLERANCE), queries, iterations * 10
+                ))
+        
+        if "yolo" in stages:
+            if vision.yolo:
+                report["yolo"] = summarize(time_stage(vision.detect_objects, small_frames, iterations))
+            else:
+                report["yolo"] = {"skipped": "YOLO model unavailable"}
+            if args.compare_backends:
+                # Latency and mAP@0.5 drift of exported/quantized models vs PyTorch FP32
+                report["yolo_backends"] = compare_backends(
+                    small_frames, args.compare_backends.split(","), iterations=iterations,
+                    message_callback=lambda msg: print(msg, file=sys.stderr)
+                )
+        
+        if "draw" in stages:
+            results = [synthetic_result(frame) for frame in frames]
+            report["draw"] = summarize(time_stage(
+                lambda r: vision.annotate_frame(r.frame.copy(), r), results, iterations
+            ))
+        
+        if "gui_conversion" in stages:
+            converter = FrameConverter()
+            report["gui_conversion"] = summarize(time_stage(converter.convert, frames, iterations))
+        
+        if "pencil_sketch" in stages:
+            report["pencil_sketch"] = summarize(time_stage(art.pencil_sketch, crops, iterations))
+        
+        if "pixel_art" in stages:
+            report["pixel_art"] = summarize(time_stage(art.pixel_art, crops, iterations))
+        
+        if "face_hash" in stages:
+            report["face_hash"] = summarize(time_stage(vision.generate_face_hash, crops, iterations))
+        
+        if "load_known_faces" in stages:
+            report["load_known_faces"] = bench_load_known_faces(vision, paths, iterations)
+    finally:
+        vision.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "frame_size": list(FRAME_SIZE),
+        "sample_frames": len(frames),
+        "iterations": iterations,
+        "stages": report,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vision and art stages offline")
+    parser.add_argument("--iterations", type=int, default=20, help="timed calls per stage")
+    parser.add_argument("--stages", default=None, help=f"comma-separated subset of: {','.join(STAGES)}")
+    parser.add_argument("--gallery-sizes", default="10,100,500", help="known-face counts for the match stage")
+    parser.add_argument("--compare-backends", default=None,
+                        help="YOLO backends to compare, e.g. pytorch,onnx,onnx:int8,openvino:int8")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON report path ('-' for stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"📊 Benchmark report written to {args.output}", file=sys.stderr)
+    
+    for stage, stats in report["stages"].get("yolo_backends", {}).items():
+        if "p50_ms" in stats:
+            print(f"{stage:>18}: p50 {stats['p50_ms']:.2f} ms  mAP50 vs pytorch {stats['map50_vs_pytorch']}",
+                  file=sys.stderr)
+    for stage, stats in report["stages"].items():
+        if "p50_ms" in stats:
+            print(f"{stage:>18}: p50 {stats['p50_ms']:.2f} ms  p95 {stats['p95_ms']:.2f} ms", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
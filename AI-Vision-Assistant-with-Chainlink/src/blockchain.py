@@ -1,24 +1,42 @@
 import json
-import time
-from web3 import Web3
 from constants import (
     BLOCKCHAIN_RPC, NFT_CONTRACT_ADDRESS, PRIVATE_KEY, 
-    CHAINLINK_ETH_USD_ADDRESS, CHAINLINK_BTC_USD_ADDRESS
+    CHAINLINK_ETH_USD_ADDRESS, CHAINLINK_BTC_USD_ADDRESS, RPC_TIMEOUT, VRF_SUBSCRIPTION_ID
 )
+from rpc import RpcBatchClient, ContractReader, pooled_session
+from transactions import TransactionSender
+from vrf_watcher import VRFWatcher
+from chain_indexer import ChainIndexer
+
+class TransactionReverted(RuntimeError):
+    """A mined transaction failed; retrying the same hash cannot succeed"""
 
 class BlockchainManager:
-    def __init__(self, message_callback=None):
+    def __init__(self, message_callback=None, connect=True):
         self.w3 = None
         self.account = None
         self.nft_contract = None
         self.eth_usd_feed = None
         self.btc_usd_feed = None
         self.message_callback = message_callback
-        self.setup_blockchain()
+        # One keep-alive session for web3 and for batched reads
+        self.session = pooled_session()
+        self.rpc = RpcBatchClient(BLOCKCHAIN_RPC, session=self.session)
+        self.reader = None
+        self.sender = None
+        self.vrf_watcher = None
+        self.indexer = None
+        self.max_batch_size = None
+        if connect:
+            self.setup_blockchain()
     
     def setup_blockchain(self):
         try:
-            self.w3 = Web3(Web3.HTTPProvider(BLOCKCHAIN_RPC))
+            # web3 is slow to import; load it only when connecting
+            from web3 import Web3
+            self.w3 = Web3(Web3.HTTPProvider(
+                BLOCKCHAIN_RPC, session=self.session, request_kwargs={"timeout": RPC_TIMEOUT}
+            ))
             if not self.w3.is_connected():
                 if self.message_callback:
                     self.message_callback("⚠️ Failed to connect to Ethereum Sepolia via Alchemy")
@@ -46,6 +64,18 @@ class BlockchainManager:
                 address=CHAINLINK_BTC_USD_ADDRESS,
                 abi=chainlink_abi
             )
+            self.reader = ContractReader(self.w3, self.rpc)
+            self.sender = TransactionSender(
+                self.w3, self.account, PRIVATE_KEY, rpc=self.rpc, message_callback=self.message_callback
+            )
+            self.vrf_watcher = VRFWatcher(
+                self.w3, self.nft_contract, self.reader, message_callback=self.message_callback
+            )
+            self.indexer = ChainIndexer(
+                self.w3, self.nft_contract, subscription_id=VRF_SUBSCRIPTION_ID,
+                message_callback=self.message_callback
+            )
+            self.indexer.start()
             
             if self.message_callback:
                 self.message_callback("🔗 Blockchain connected to Sepolia testnet")
@@ -73,15 +103,21 @@ class BlockchainManager:
             }
         ]
     
+    def batch_read(self, calls):
+        """[(contract, function_name, args)] -> decoded results, in one JSON-RPC round trip"""
+        if not self.reader:
+            raise RuntimeError("Blockchain not connected")
+        return self.reader.read(calls)
+    
     def get_crypto_prices(self):
         try:
-            # Get ETH price
-            _, eth_price, _, _, _ = self.eth_usd_feed.functions.latestRoundData().call()
-            eth_price_usd = eth_price / 10**8
-            
-            # Get BTC price
-            _, btc_price, _, _, _ = self.btc_usd_feed.functions.latestRoundData().call()
-            btc_price_usd = btc_price / 10**8
+            # Both feeds in one batched request
+            eth_round, btc_round = self.batch_read([
+                (self.eth_usd_feed, "latestRoundData", ()),
+                (self.btc_usd_feed, "latestRoundData", ()),
+            ])
+            eth_price_usd = eth_round[1] / 10**8
+            btc_price_usd = btc_round[1] / 10**8
             
             return eth_price_usd, btc_price_usd
         except Exception as e:
@@ -89,22 +125,70 @@ class BlockchainManager:
                 self.message_callback(f"⚠️ Crypto price fetch failed: {str(e)}")
             return None, None
     
+    def get_dashboard_state(self, address=None):
+        """Prices, registration and token counter in a single round trip; None if unavailable"""
+        try:
+            address = address or self.account.address
+            eth_round, btc_round, registered, face_hash, token_counter = self.batch_read([
+                (self.eth_usd_feed, "latestRoundData", ()),
+                (self.btc_usd_feed, "latestRoundData", ()),
+                (self.nft_contract, "isUserRegistered", (address,)),
+                (self.nft_contract, "getUserFaceHash", (address,)),
+                (self.nft_contract, "getTokenCounter", ()),
+            ])
+            return {
+                "eth_usd": eth_round[1] / 10**8,
+                "btc_usd": btc_round[1] / 10**8,
+                "registered": registered,
+                "face_hash": face_hash,
+                "token_counter": token_counter,
+            }
+        except Exception as e:
+            if self.message_callback:
+                self.message_callback(f"⚠️ Dashboard refresh failed: {str(e)}")
+            return None
+    
+    def get_registered_face_hash(self, address=None):
+        """Face hash registered by address (default: this account), from the local event index"""
+        try:
+            if not self.indexer:
+                return None
+            return self.indexer.face_hash_for_address(address or self.account.address)
+        except Exception:
+            return None
+    
+    def get_token_id_by_request(self, request_id):
+        """Token minted for a VRF request; local index first, contract call if not indexed yet"""
+        if self.indexer:
+            token_id = self.indexer.token_for_request(request_id)
+            if token_id is not None:
+                return token_id
+        if not self.nft_contract:
+            return None
+        return self.nft_contract.functions.getTokenIdByRequest(request_id).call() or None
+    
+    def get_minted_tokens(self, owner=None):
+        """Tokens minted to owner (default: this account), from the local event index"""
+        try:
+            if not self.indexer:
+                return []
+            return self.indexer.mints_by_owner(owner or self.account.address)
+        except Exception:
+            return []
+    
+    def get_history_summary(self):
+        try:
+            return self.indexer.summary() if self.indexer else None
+        except Exception:
+            return None
+    
     def register_user_on_blockchain(self, face_hash):
         try:
             if not self.nft_contract:
                 return None
                 
-            transaction = self.nft_contract.functions.registerUser(face_hash).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 200000,
-                'gasPrice': self.w3.to_wei('20', 'gwei')
-            })
-            
-            # Fixed: Use new web3 transaction signing method
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)  # Fixed: use raw_transaction
-            return tx_hash.hex()
+            # Local nonce, estimated gas and EIP-1559 fees; returns without waiting for the receipt
+            return self.sender.send(self.nft_contract.functions.registerUser(face_hash))
             
         except Exception as e:
             if self.message_callback:
@@ -116,41 +200,80 @@ class BlockchainManager:
             if not self.nft_contract:
                 return None
                 
-            transaction = self.nft_contract.functions.requestNFT(metadata_uri).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 500000,
-                'gasPrice': self.w3.to_wei('30', 'gwei')
-            })
-            
-            # Fixed: Use new web3 transaction signing method
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)  # Fixed: use raw_transaction
-            return tx_hash.hex()
+            return self.sender.send(self.nft_contract.functions.requestNFT(metadata_uri))
             
         except Exception as e:
             if self.message_callback:
                 self.message_callback(f"❌ NFT minting failed: {str(e)}")
             return None
     
-    def monitor_vrf_fulfillment(self, tx_hash):
+    def get_max_batch_size(self):
+        """Largest requestNFTBatch the contract accepts with its callback gas settings"""
+        if self.max_batch_size is None:
+            self.max_batch_size = self.nft_contract.functions.maxBatchSize().call()
+        return self.max_batch_size
+    
+    def request_nft_mint_batch(self, metadata_uris):
+        """Mint many tokens with one VRF request per get_max_batch_size() URIs.
+        
+        Returns (sent, unsent): sent lists (uris, tx_hash) for every chunk
+        submitted, unsent the URIs not submitted because a chunk failed.
+        """
+        metadata_uris = list(metadata_uris)
+        sent = []
         try:
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
-            if not receipt.status:
-                return False, "Transaction failed"
+            if not self.nft_contract:
+                return sent, metadata_uris
             
-            # Monitor for fulfillment
-            for i in range(30):
-                time.sleep(10)
-                try:
-                    # Check if any new tokens were minted
-                    token_counter = self.nft_contract.functions.getTokenCounter().call()
-                    if token_counter > 0:
-                        return True, f"NFT minted successfully! Token counter: {token_counter}"
-                except:
-                    continue
+            size = self.get_max_batch_size()
+            if not size:
+                raise RuntimeError("Contract callback gas leaves no room for batch mints")
+            for start in range(0, len(metadata_uris), size):
+                chunk = metadata_uris[start:start + size]
+                sent.append((chunk, self.sender.send(self.nft_contract.functions.requestNFTBatch(chunk))))
+            return sent, []
             
-            return False, "VRF fulfillment timeout"
+        except Exception as e:
+            unsent = metadata_uris[sum(len(chunk) for chunk, _ in sent):]
+            if self.message_callback:
+                self.message_callback(
+                    f"❌ Batch NFT minting failed: {str(e)} "
+                    f"({len(metadata_uris) - len(unsent)} URIs sent in {len(sent)} transactions, {len(unsent)} not sent)"
+                )
+            return sent, unsent
+    
+    def get_vrf_request_id(self, tx_hash):
+        """VRF requestId of a mint transaction, once it is mined"""
+        if not self.sender:
+            raise RuntimeError("Blockchain not connected")
+        # Follows the tx through any fee-bump replacements
+        receipt = self.sender.wait_for_receipt(tx_hash, timeout=300)
+        if not receipt.status:
+            raise TransactionReverted(f"Transaction {tx_hash} failed")
+        return self.vrf_watcher.request_id_from_receipt(receipt)
+    
+    def watch_vrf_request(self, request_id):
+        """Future resolving to the token id minted for request_id"""
+        if not self.vrf_watcher:
+            raise RuntimeError("Blockchain not connected")
+        return self.vrf_watcher.watch(request_id)
+    
+    def watch_vrf_fulfillment(self, tx_hash):
+        """Future resolving to the token id minted for the VRF request sent in tx_hash"""
+        return self.watch_vrf_request(self.get_vrf_request_id(tx_hash))
+    
+    def monitor_vrf_fulfillment(self, tx_hash):
+        try:
+            token_id = self.watch_vrf_fulfillment(tx_hash).result()
+            return True, f"NFT minted successfully! Token ID: {token_id}"
             
+        except TimeoutError:
+            return False, "VRF fulfillment timeout"
         except Exception as e:
             return False, f"VRF monitoring error: {str(e)}"
+    
+    def shutdown(self):
+        if self.indexer:
+            self.indexer.close()
+        if self.sender:
+            self.sender.stop()
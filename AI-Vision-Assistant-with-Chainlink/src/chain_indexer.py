@@ -0,0 +1,220 @@
+import sqlite3
+import threading
+from constants import (
+    INDEXER_DB_PATH, INDEXER_START_BLOCK, INDEXER_BACKFILL_BLOCKS, INDEXER_CONFIRMATIONS,
+    INDEXER_POLL_SECONDS, LOG_BLOCK_RANGE, VRF_COORDINATOR
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    contract TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrations (
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    face_hash TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS registrations_face_hash ON registrations (face_hash);
+CREATE INDEX IF NOT EXISTS registrations_address ON registrations (address);
+CREATE TABLE IF NOT EXISTS nft_requests (
+    request_id TEXT PRIMARY KEY,
+    requester TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mints (
+    token_id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    request_id TEXT,
+    block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mints_owner ON mints (owner);
+CREATE INDEX IF NOT EXISTS mints_request ON mints (request_id);
+"""
+
+# RandomWordsFulfilled(requestId indexed, outputSeed, subId indexed, payment, nativePayment, success, onlyPremium)
+FULFILLED_SIGNATURE = "RandomWordsFulfilled(uint256,uint256,uint256,uint96,bool,bool,bool)"
+
+class ChainIndexer:
+    """Mirrors the NFT contract's events into a local SQLite database.
+    
+    UserRegistered, NFTRequested and NFTMinted logs are fetched in block
+    ranges of at most LOG_BLOCK_RANGE and written together with the new
+    checkpoint in one transaction, so an interrupted sync resumes where it
+    stopped. Only blocks INDEXER_CONFIRMATIONS behind the head are indexed
+    to stay clear of reorgs. NFTMinted carries no requestId, so each mint
+    is joined to the VRF coordinator's RandomWordsFulfilled log from the
+    same fulfilment transaction.
+    
+    Request ids are stored as text because they are full uint256 values.
+    """
+    def __init__(self, w3, contract, db_path=INDEXER_DB_PATH, subscription_id=None, message_callback=None):
+        self.w3 = w3
+        self.contract = contract
+        self.subscription_id = subscription_id
+        self.message_callback = message_callback or print
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        
+        self.events = {
+            self._topic("UserRegistered(address,string)"): self.contract.events.UserRegistered(),
+            self._topic("NFTRequested(uint256,address)"): self.contract.events.NFTRequested(),
+            self._topic("NFTMinted(uint256,address)"): self.contract.events.NFTMinted(),
+        }
+        self.fulfilled_topic = self._topic(FULFILLED_SIGNATURE)
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def _topic(self, signature):
+        return self.w3.to_hex(self.w3.keccak(text=signature))
+    
+    def checkpoint(self):
+        """Last fully indexed block, or None before the first sync"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT block FROM checkpoint WHERE contract = ?", (self.contract.address,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def sync(self):
+        """Index every confirmed block since the checkpoint; returns the number of new events"""
+        head = self.w3.eth.block_number - INDEXER_CONFIRMATIONS
+        last = self.checkpoint()
+        if last is None:
+            start = INDEXER_START_BLOCK if INDEXER_START_BLOCK is not None else max(0, head - INDEXER_BACKFILL_BLOCKS)
+        else:
+            start = last + 1
+        
+        added = 0
+        while start <= head and not self.stop_event.is_set():
+            end = min(start + LOG_BLOCK_RANGE - 1, head)
+            added += self._index_range(start, end)
+            start = end + 1
+        return added
+    
+    def _index_range(self, start, end):
+        logs = self.w3.eth.get_logs({
+            "address": self.contract.address,
+            "topics": [list(self.events)],
+            "fromBlock": start,
+            "toBlock": end,
+        })
+        registrations, requests, mints = [], [], []
+        for log in logs:
+            topic = self.w3.to_hex(log["topics"][0])
+            event = self.events[topic].process_log(log)
+            args = event["args"]
+            tx_hash = self.w3.to_hex(log["transactionHash"])
+            if event["event"] == "UserRegistered":
+                registrations.append((tx_hash, log["logIndex"], log["blockNumber"], args["user"], args["faceHash"]))
+            elif event["event"] == "NFTRequested":
+                requests.append((str(args["requestId"]), args["requester"], log["blockNumber"], tx_hash))
+            else:
+                mints.append((args["tokenId"], args["owner"], log["blockNumber"], tx_hash))
+        
+        request_by_tx = self._fulfilled_requests(start, end) if mints else {}
+        
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR IGNORE INTO registrations VALUES (?, ?, ?, ?, ?)", registrations)
+            self.db.executemany("INSERT OR IGNORE INTO nft_requests VALUES (?, ?, ?, ?)", requests)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO mints VALUES (?, ?, ?, ?, ?)",
+                [(token_id, owner, request_by_tx.get(tx_hash), block, tx_hash)
+                 for token_id, owner, block, tx_hash in mints]
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (?, ?)", (self.contract.address, end)
+            )
+        return len(logs)
+    
+    def _fulfilled_requests(self, start, end):
+        """fulfilment tx hash -> requestId from the coordinator's logs in the same range"""
+        topics = [self.fulfilled_topic]
+        if self.subscription_id is not None:
+            topics += [None, "0x" + int(self.subscription_id).to_bytes(32, "big").hex()]
+        logs = self.w3.eth.get_logs({
+            "address": VRF_COORDINATOR,
+            "topics": topics,
+            "fromBlock": start,
+            "toBlock": end,
+        })
+        return {
+            self.w3.to_hex(log["transactionHash"]): str(int(self.w3.to_hex(log["topics"][1]), 16))
+            for log in logs
+        }
+    
+    def start(self, interval=INDEXER_POLL_SECONDS):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self.thread.start()
+    
+    def _run(self, interval):
+        while True:
+            try:
+                added = self.sync()
+                if added:
+                    self.message_callback(f"🗂️ Indexed {added} new contract events")
+            except Exception as e:
+                self.message_callback(f"⚠️ Event indexer sync failed: {str(e)}")
+            if self.stop_event.wait(interval):
+                return
+    
+    def stop(self):
+        self.stop_event.set()
+    
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+    
+    def address_for_face_hash(self, face_hash):
+        rows = self._query("SELECT address FROM registrations WHERE face_hash = ? ORDER BY block DESC LIMIT 1", (face_hash,))
+        return rows[0][0] if rows else None
+    
+    def face_hash_for_address(self, address):
+        rows = self._query("SELECT face_hash FROM registrations WHERE address = ? ORDER BY block DESC LIMIT 1", (address,))
+        return rows[0][0] if rows else None
+    
+    def token_for_request(self, request_id):
+        # Batch requests mint several tokens; the first one identifies the request
+        rows = self._query("SELECT token_id FROM mints WHERE request_id = ? ORDER BY token_id LIMIT 1", (str(request_id),))
+        return rows[0][0] if rows else None
+    
+    def mints_by_owner(self, owner):
+        return [
+            {"token_id": token_id, "request_id": request_id, "block": block, "tx_hash": tx_hash}
+            for token_id, request_id, block, tx_hash in self._query(
+                "SELECT token_id, request_id, block, tx_hash FROM mints WHERE owner = ? ORDER BY token_id", (owner,)
+            )
+        ]
+    
+    def pending_requests(self):
+        """Requests with no matching mint indexed yet"""
+        return [row[0] for row in self._query(
+            "SELECT request_id FROM nft_requests WHERE request_id NOT IN "
+            "(SELECT request_id FROM mints WHERE request_id IS NOT NULL) ORDER BY block"
+        )]
+    
+    def summary(self):
+        """Short history line for the chat context"""
+        (registered,), (requested,), (minted,) = (
+            self._query("SELECT COUNT(DISTINCT address) FROM registrations")[0],
+            self._query("SELECT COUNT(*) FROM nft_requests")[0],
+            self._query("SELECT COUNT(*) FROM mints")[0],
+        )
+        return f"{registered} registered users, {requested} NFT requests, {minted} NFTs minted"
+    
+    def close(self):
+        self.stop()
+        if self.thread:
+            self.thread.join(timeout=5)
+        with self.lock:
+            self.db.close()
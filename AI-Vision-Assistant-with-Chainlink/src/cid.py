@@ -0,0 +1,98 @@
+import base64
+import hashlib
+
+# Same layout Pinata (kubo defaults) uses for pinFileToIPFS
+CHUNK_SIZE = 262144  # size-262144 chunker
+MAX_LINKS = 174  # balanced DAG fan-out
+
+DAG_PB = 0x70
+RAW = 0x55
+SHA2_256 = 0x12
+UNIXFS_FILE = 2
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _field(number, data):
+    """Length-delimited protobuf field"""
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+def _uint_field(number, value):
+    return _varint(number << 3) + _varint(value)
+
+def _unixfs_file(data=b"", filesize=0, blocksizes=()):
+    message = _uint_field(1, UNIXFS_FILE)
+    if data:
+        message += _field(2, data)
+    message += _uint_field(3, filesize)
+    for size in blocksizes:
+        message += _uint_field(4, size)
+    return message
+
+def _dag_pb(data, links=()):
+    """PBNode with links (field 2) serialised before data (field 1), as go-merkledag does"""
+    node = b""
+    for cid_bytes, tsize in links:
+        node += _field(2, _field(1, cid_bytes) + _field(2, b"") + _uint_field(3, tsize))
+    return node + _field(1, data)
+
+def _multihash(block):
+    return bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+
+def _cid_bytes(block, codec, version):
+    if version == 0:
+        return _multihash(block)
+    return _varint(1) + _varint(codec) + _multihash(block)
+
+def _base58(data):
+    number = int.from_bytes(data, "big")
+    out = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        out = BASE58_ALPHABET[remainder] + out
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + out
+
+def cid_to_string(cid_bytes, version):
+    if version == 0:
+        return _base58(cid_bytes)
+    return "b" + base64.b32encode(cid_bytes).decode().lower().rstrip("=")
+
+def compute_cid(data, version=0):
+    """CID Pinata returns for these bytes pinned as a file with this cidVersion.
+    
+    CIDv0 uses UnixFS leaves in dag-pb; CIDv1 uses raw leaves (kubo's
+    default for v1), so a file of one chunk is just its raw block.
+    """
+    chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)] or [b""]
+    
+    # (cid bytes, file bytes covered, cumulative block size) per node
+    level = []
+    for chunk in chunks:
+        if version == 0:
+            block = _dag_pb(_unixfs_file(chunk, len(chunk)))
+            level.append((_cid_bytes(block, DAG_PB, 0), len(chunk), len(block)))
+        else:
+            level.append((_cid_bytes(chunk, RAW, 1), len(chunk), len(chunk)))
+    
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level), MAX_LINKS):
+            children = level[i:i + MAX_LINKS]
+            sizes = [size for _, size, _ in children]
+            block = _dag_pb(_unixfs_file(filesize=sum(sizes), blocksizes=sizes),
+                            [(cid_bytes, tsize) for cid_bytes, _, tsize in children])
+            parents.append((_cid_bytes(block, DAG_PB, version), sum(sizes),
+                            len(block) + sum(tsize for _, _, tsize in children)))
+        level = parents
+    
+    return cid_to_string(level[0][0], version)
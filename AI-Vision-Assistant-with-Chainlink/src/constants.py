@@ -8,19 +8,94 @@ load_dotenv()
 KNOWN_FACES_DIR = "known_faces"
 YOLO_MODEL_PATH = "yolov8n.pt"
 
+# Face Recognition Configuration
+FACE_MATCH_TOLERANCE = 0.6
+FACE_ENCODING_CACHE = os.path.join(KNOWN_FACES_DIR, ".encodings.npz")
+
+# Face Tracking Configuration
+TRACK_IOU_THRESHOLD = 0.3  # Minimum overlap to continue an existing track
+TRACK_MAX_MISSES = 10  # Frames a track may go undetected before it is dropped
+TRACK_REVERIFY_INTERVAL = 30  # Frames between re-encoding an identified face
+TRACK_UNCERTAIN_INTERVAL = 5  # Frames between re-encoding an unknown face
+
+# Object Detection Scheduling
+YOLO_SCHEDULE = "adaptive"  # "every_frame", "interval" or "adaptive"
+YOLO_INTERVAL = 3  # Frames between YOLO runs in "interval" mode
+YOLO_MIN_INTERVAL = 1  # Bounds for the interval chosen in "adaptive" mode
+YOLO_MAX_INTERVAL = 15
+TARGET_FPS = 20  # Frame budget the adaptive scheduler aims to hold
+
+# Object Detection Backend
+YOLO_BACKEND = os.getenv('YOLO_BACKEND', "pytorch")  # "pytorch", "onnx" (ONNX Runtime) or "openvino"
+YOLO_IMGSZ = 640  # Inference input size; exported models are fixed to it
+YOLO_INT8 = False  # INT8 quantization for the onnx/openvino backends
+YOLO_INT8_DATA = "coco8.yaml"  # Calibration dataset for OpenVINO INT8 export
+YOLO_EXPORT_DIR = "models"  # Where exported models are cached
+YOLO_BATCH_SIZE = 1  # Max frames per YOLO call; >1 batches concurrent requests (multi-stream / offline)
+YOLO_BATCH_WAIT_MS = 15  # Longest a request waits for a batch to fill
+
+# Face Analysis Worker Pool
+FACE_WORKER_PROCESSES = max(1, (os.cpu_count() or 2) // 2)  # 0 runs dlib in the video thread
+FACE_POOL_FRAME_BYTES = 960 * 540 * 3  # Shared block size, fits a half-resolution 1080p frame
+FACE_POOL_WARMUP_SECONDS = 120  # Longest a face worker waits for the others to load their models
+
+# Camera Configuration
+CAMERA_SOURCES = [s for s in os.getenv('CAMERA_SOURCES', "0").split(",") if s.strip()]  # Device indices or stream URLs
+
+# Video Pipeline Configuration
+VISION_WORKERS = max(1, FACE_WORKER_PROCESSES)  # Inference threads pulling the latest captured frame
+DISPLAY_FPS = 60  # GUI refresh cadence (match the monitor), independent of inference speed
+MESSAGE_FLUSH_MS = 100  # How often queued chat messages are written to the chat panel
+
+# Metrics Configuration
+METRICS_WINDOW = 1024  # Samples per stage kept for the rolling p50/p95/p99
+METRICS_FPS_WINDOW = 2.0  # Seconds of events averaged into the FPS readings
+METRICS_STATUS_MS = 1000  # Status bar refresh interval
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0')) or None  # Serve /metrics on localhost when set
+METRICS_FILE = os.getenv('METRICS_FILE')  # Periodically rewrite this JSON file when set
+ERROR_REPORT_SECONDS = 30  # Repeated per-frame errors reach the chat at most this often
+
 # API Configuration
 OPENROUTER_KEY = os.getenv('OPENROUTER_KEY')
 STABILITY_KEY = os.getenv('STABILITY_KEY')
 
 # Blockchain Configuration (Updated for Sepolia)
 ALCHEMY_API_KEY = os.getenv('ALCHEMY_API_KEY')
-BLOCKCHAIN_RPC = f"https://eth-sepolia.g.alchemy.com/v2/{ALCHEMY_API_KEY}"  # Changed to Sepolia
+BLOCKCHAIN_RPC = os.getenv('BLOCKCHAIN_RPC') or f"https://eth-sepolia.g.alchemy.com/v2/{ALCHEMY_API_KEY}"  # Changed to Sepolia; override for a local dev node
+RPC_TIMEOUT = 10  # Seconds per JSON-RPC HTTP request
+RPC_POOL_SIZE = 8  # Keep-alive connections shared by web3 and batched reads
+
+# Transaction Configuration
+TX_GAS_MARGIN = 1.2  # Multiplier on estimate_gas
+FEE_HISTORY_BLOCKS = 10  # Blocks of fee_history used to price EIP-1559 fees
+FEE_PRIORITY_PERCENTILE = 50  # Priority-fee percentile paid within those blocks
+FEE_CACHE_SECONDS = 12  # Reuse fee estimates for about one block
+MIN_PRIORITY_FEE_GWEI = 1  # Floor for the tip on quiet testnets
+NONCE_RESYNC_SECONDS = 60  # Re-read the pending nonce from the node at most this often
+STUCK_TX_SECONDS = 90  # Pending time after which a tx is re-sent with higher fees
+TX_REPLACEMENT_BUMP = 1.125  # Fee increase for replacements (nodes require >= 10%)
 NFT_CONTRACT_ADDRESS = "0xE04C1491d38C4e9C4611E2D7AB1FB23422898735"
 PRIVATE_KEY = os.getenv('PRIVATE_KEY')
 
+# Mint Queue Configuration
+MINT_QUEUE_DB = "mint_jobs.db"
+MINT_WORKERS = 2  # Jobs advanced concurrently; VRF waits do not hold a worker
+MINT_MAX_ATTEMPTS = 5  # Tries per stage before the job fails; once the tx is sent only a revert fails it
+MINT_RETRY_SECONDS = 10  # First retry delay; doubles per attempt
+
 # Chainlink Configuration (Sepolia Testnet)
 VRF_COORDINATOR = "0x9DdfaCa8183c41ad55329BdeeD9F6A8d53168B1B"
 VRF_SUBSCRIPTION_ID = "82348361337016412546914523271585046779368243734304033559659474398417319807559"
+VRF_POLL_SECONDS = 4  # Interval of the shared NFTMinted log poll
+VRF_TIMEOUT_SECONDS = 600  # Give up on a request not fulfilled within this time
+LOG_BLOCK_RANGE = 2000  # Max blocks per eth_getLogs call (provider limits)
+
+# Event Indexer Configuration
+INDEXER_DB_PATH = "chain_index.db"
+INDEXER_START_BLOCK = int(os.getenv('INDEXER_START_BLOCK')) if os.getenv('INDEXER_START_BLOCK') else None  # Contract deployment block
+INDEXER_BACKFILL_BLOCKS = 50000  # History indexed on first run when no start block is set
+INDEXER_CONFIRMATIONS = 3  # Stay this many blocks behind the head to avoid reorgs
+INDEXER_POLL_SECONDS = 15
 
 # Chainlink Data Feeds (Sepolia Testnet)
 CHAINLINK_ETH_USD_ADDRESS = "0x694AA1769357215DE4FAC081bf1f309aDC325306"  # Sepolia ETH/USD
@@ -29,3 +104,11 @@ CHAINLINK_BTC_USD_ADDRESS = "0x1b44F3514812d835EB1BDB0acB33d3fA3351Ee43"  # Sepo
 # IPFS Configuration
 IPFS_PROJECT_ID = os.getenv('IPFS_PROJECT_ID')
 IPFS_SECRET = os.getenv('IPFS_SECRET')
+PINATA_API_URL = os.getenv('PINATA_API_URL') or "https://api.pinata.cloud"  # Override for a local stand-in
+IPFS_CONNECT_TIMEOUT = 5  # Seconds to establish a connection to Pinata
+IPFS_READ_TIMEOUT = 60  # Seconds to wait for a pin response
+IPFS_MAX_RETRIES = 4  # Retries on 429/5xx and dropped connections
+IPFS_BACKOFF_SECONDS = 0.5  # First retry delay; doubles per attempt
+IPFS_UPLOAD_WORKERS = 4  # Concurrent uploads (and pooled connections) for bulk pinning
+IPFS_CID_VERSION = 0  # cidVersion requested from Pinata and computed locally
+IPFS_PIN_CACHE = "ipfs_pins.json"  # CIDs already pinned, to skip repeat uploads
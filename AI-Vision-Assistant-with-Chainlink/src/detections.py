@@ -0,0 +1,48 @@
+import numpy as np
+
+# One row per detected object, full-resolution pixel coordinates
+DETECTION_DTYPE = np.dtype([
+    ("box", np.int32, (4,)),  # x1, y1, x2, y2
+    ("confidence", np.float32),
+    ("class_id", np.int32),
+])
+
+def empty_detections():
+    return np.zeros(0, dtype=DETECTION_DTYPE)
+
+def from_array(data, conf_threshold=0.3, scale=1):
+    """Build a detection array from an (N, 6) [x1, y1, x2, y2, conf, cls] array.
+
+    Filtering and rescaling run as whole-array operations, so the cost
+    stays flat however many objects are in the frame.
+    """
+    data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+    data = data[data[:, 4] > conf_threshold]
+    detections = np.empty(len(data), dtype=DETECTION_DTYPE)
+    # Truncate like int() before scaling, matching the per-box conversion it replaces
+    detections["box"] = data[:, :4].astype(np.int32) * scale
+    detections["confidence"] = data[:, 4]
+    detections["class_id"] = data[:, 5].astype(np.int32)
+    return detections
+
+def from_yolo(result, conf_threshold=0.3, scale=1):
+    """Detections from one Ultralytics Results object with a single tensor transfer"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+    # boxes.data is the raw (N, 6) tensor; one .cpu().numpy() instead of three lookups per box
+    return from_array(boxes.data.cpu().numpy(), conf_threshold, scale)
+
+def to_dicts(detections, labels):
+    """The {"box", "label", "confidence", "class_id"} dicts used by callers that want plain Python"""
+    return [
+        {
+            "box": tuple(box),
+            "label": labels.get(class_id, str(class_id)),
+            "confidence": confidence,
+            "class_id": class_id,
+        }
+        for box, confidence, class_id in zip(
+            detections["box"].tolist(), detections["confidence"].tolist(), detections["class_id"].tolist()
+        )
+    ]
@@ -0,0 +1,322 @@
+import os
+import time
+import queue
+import shutil
+import threading
+from concurrent.futures import Future
+import numpy as np
+from constants import (
+    YOLO_MODEL_PATH, YOLO_BACKEND, YOLO_IMGSZ, YOLO_INT8,
+    YOLO_INT8_DATA, YOLO_EXPORT_DIR, YOLO_BATCH_SIZE, YOLO_BATCH_WAIT_MS
+)
+from detections import from_yolo
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+class YoloDetector:
+    """YOLO object detector on a selectable CPU inference backend.
+    
+    "pytorch" runs the .pt weights directly. "onnx" and "openvino" export
+    the weights once into YOLO_EXPORT_DIR (fixed input size, optionally
+    INT8) and run them through ONNX Runtime or OpenVINO via Ultralytics,
+    so predictions keep the same Results format. If an export or backend
+    fails to load, the detector falls back to PyTorch.
+    """
+    def __init__(self, backend=YOLO_BACKEND, model_path=YOLO_MODEL_PATH, imgsz=YOLO_IMGSZ,
+                 int8=YOLO_INT8, export_dir=YOLO_EXPORT_DIR, message_callback=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown YOLO backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.int8 = int8 and backend != "pytorch"
+        self.export_dir = export_dir
+        self.message_callback = message_callback or print
+        self.model = None
+    
+    @property
+    def label(self):
+        return f"{self.backend}{'-int8' if self.int8 else ''}@{self.imgsz}"
+    
+    @property
+    def names(self):
+        return getattr(self.model, "names", None) or {}
+    
+    def exported_path(self):
+        stem = os.path.splitext(os.path.basename(self.model_path))[0]
+        suffix = f"_{self.imgsz}{'_int8' if self.int8 else ''}"
+        if self.backend == "onnx":
+            return os.path.join(self.export_dir, f"{stem}{suffix}.onnx")
+        return os.path.join(self.export_dir, f"{stem}{suffix}_openvino_model")
+    
+    def load(self):
+        from ultralytics import YOLO
+        try:
+            path = self.prepare()
+            self.model = YOLO(path, task="detect")
+        except Exception as e:
+            if self.backend == "pytorch":
+                raise
+            self.message_callback(f"⚠️ YOLO {self.label} backend unavailable, using PyTorch: {str(e)}")
+            self.backend, self.int8 = "pytorch", False
+            self.model = YOLO(self.model_path)
+        self.message_callback(f"✅ YOLO model loaded ({self.label})")
+        return self
+    
+    def prepare(self):
+        """Path of the model for this backend, exporting it on first use"""
+        if self.backend == "pytorch":
+            return self.model_path
+        target = self.exported_path()
+        if os.path.exists(target):
+            return target
+        
+        from ultralytics import YOLO
+        os.makedirs(self.export_dir, exist_ok=True)
+        self.message_callback(f"📦 Exporting {self.model_path} for {self.label}...")
+        source = YOLO(self.model_path)
+        if self.backend == "openvino":
+            exported = source.export(format="openvino", imgsz=self.imgsz, int8=self.int8,
+                                     data=YOLO_INT8_DATA if self.int8 else None)
+            shutil.move(exported, target)
+        else:
+            exported = source.export(format="onnx", imgsz=self.imgsz, dynamic=False, simplify=True)
+            if self.int8:
+                quantize_onnx(exported, target)
+            else:
+                shutil.move(exported, target)
+        return target
+    
+    def predict(self, image, conf=0.3, scale=1):
+        """Detection array for one BGR image, boxes multiplied by scale"""
+        results = self.model(image, verbose=False, conf=conf, imgsz=self.imgsz)
+        return from_yolo(results[0], conf_threshold=conf, scale=scale)
+    
+    def predict_batch(self, images, conf=0.3, scales=None):
+        """Detection arrays for several images from a single inference call"""
+        scales = scales or [1] * len(images)
+        if self.backend == "pytorch":
+            results = self.model(list(images), verbose=False, conf=conf, imgsz=self.imgsz)
+        else:
+            # Exported models have a fixed batch dimension of 1
+            results = [self.model(image, verbose=False, conf=conf, imgsz=self.imgsz)[0] for image in images]
+        return [from_yolo(result, conf_threshold=conf, scale=scale) for result, scale in zip(results, scales)]
+
+class DetectionBatcher:
+    """Coalesces concurrent detection requests into batched detector calls.
+    
+    submit() returns a Future right away. A background thread takes the
+    first waiting request, keeps collecting until it has max_batch
+    images or max_wait seconds have passed since that request arrived,
+    runs one predict_batch() and resolves each Future with its own
+    detections. Frames from several streams, or several pipeline
+    workers on one stream, then share a single inference call while
+    no request waits longer than max_wait for company.
+    
+    After stop(), submit() raises RuntimeError, and any request the loop
+    never reached has its Future failed rather than left pending.
+    """
+    def __init__(self, detector, max_batch=YOLO_BATCH_SIZE, max_wait=YOLO_BATCH_WAIT_MS / 1000.0,
+                 conf=0.3, lock=None, metrics=None):
+        self.detector = detector
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.conf = conf
+        self.lock = lock or threading.Lock()
+        self.metrics = metrics
+        self.requests = queue.SimpleQueue()
+        # Guards stopped so no request is queued behind the stop sentinel
+        self.state_lock = threading.Lock()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+    
+    def submit(self, image, scale=1):
+        future = Future()
+        with self.state_lock:
+            if self.stopped:
+                raise RuntimeError("Detection batcher is stopped")
+            self.requests.put((time.perf_counter(), image, scale, future))
+        return future
+    
+    def _collect(self):
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self.requests.put(None)
+                break
+            batch.append(item)
+        return batch
+    
+    def _loop(self):
+        batch = []
+        try:
+            while True:
+                batch = self._collect()
+                if batch is None:
+                    return
+                futures = [item[3] for item in batch]
+                started = time.perf_counter()
+                try:
+                    with self.lock:
+                        outputs = self.detector.predict_batch(
+                            [item[1] for item in batch], self.conf, [item[2] for item in batch]
+                        )
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+                if self.metrics:
+                    self.metrics.record("yolo_batch", time.perf_counter() - started)
+                    self.metrics.set_gauge("yolo_batch_size", len(batch))
+                for future, detections in zip(futures, outputs):
+                    future.set_result(detections)
+        finally:
+            self._fail_pending(batch or [])
+    
+    def _fail_pending(self, batch):
+        """Refuse new requests and fail the unfinished batch plus every request still queued"""
+        with self.state_lock:
+            self.stopped = True
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        for item in batch:
+            if not item[3].done():
+                item[3].set_exception(RuntimeError("Detection batcher stopped before answering this request"))
+    
+    def stop(self, timeout=1.0):
+        with self.state_lock:
+            if not self.stopped:
+                self.stopped = True
+                self.requests.put(None)
+        self.thread.join(timeout)
+
+def quantize_onnx(source, target):
+    """Dynamic INT8 weight quantization, keeping the Ultralytics metadata (names, stride, imgsz)"""
+    import onnx
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+    original = onnx.load(source)
+    quantized = onnx.load(target)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(original.metadata_props)
+    onnx.save(quantized, target)
+
+def box_iou(a, b):
+    """Pairwise IoU of (N, 4) and (M, 4) x1, y1, x2, y2 boxes"""
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+def map50(reference, predictions):
+    """mAP@0.5 of per-image predictions against per-image reference detections.
+    
+    Used with the FP32 PyTorch output as the reference, this measures how
+    far an exported or quantized backend drifts from the original model
+    without needing a labelled dataset.
+    """
+    classes = set()
+    for ref in reference:
+        classes.update(ref["class_id"].tolist())
+    if not classes:
+        return None
+    
+    aps = []
+    for cls in sorted(classes):
+        scores, hits = [], []
+        total = 0
+        for ref, pred in zip(reference, predictions):
+            gt = ref["box"][ref["class_id"] == cls]
+            det = pred[pred["class_id"] == cls]
+            total += len(gt)
+            if not len(det):
+                continue
+            det = det[np.argsort(-det["confidence"])]
+            matched = np.zeros(len(gt), dtype=bool)
+            ious = box_iou(det["box"], gt) if len(gt) else np.zeros((len(det), 0))
+            for i in range(len(det)):
+                hit = False
+                if ious.shape[1]:
+                    candidates = np.where(~matched, ious[i], 0.0)
+                    best = int(np.argmax(candidates))
+                    if candidates[best] >= 0.5:
+                        matched[best] = True
+                        hit = True
+                scores.append(float(det["confidence"][i]))
+                hits.append(hit)
+        if not scores:
+            aps.append(0.0)
+            continue
+        order = np.argsort(-np.asarray(scores))
+        tp = np.cumsum(np.asarray(hits)[order])
+        fp = np.cumsum(~np.asarray(hits)[order])
+        recall = tp / max(total, 1)
+        precision = tp / np.maximum(tp + fp, 1)
+        # COCO-style 101-point interpolated precision
+        envelope = np.maximum.accumulate(precision[::-1])[::-1]
+        points = np.linspace(0, 1, 101)
+        idx = np.searchsorted(recall, points, side="left")
+        aps.append(float(np.append(envelope, 0.0)[idx].mean()))
+    return float(np.mean(aps))
+
+def compare_backends(images, specs, imgsz=YOLO_IMGSZ, conf=0.3, iterations=20, message_callback=None):
+    """Latency and mAP@0.5 drift of each backend relative to PyTorch FP32.
+    
+    specs: strings like "pytorch", "onnx", "onnx:int8", "openvino:int8".
+    """
+    message_callback = message_callback or print
+    reference_detector = YoloDetector("pytorch", imgsz=imgsz, message_callback=message_callback).load()
+    reference = [reference_detector.predict(image, conf) for image in images]
+    
+    report = {}
+    for spec in specs:
+        backend, _, option = spec.partition(":")
+        detector = YoloDetector(backend, imgsz=imgsz, int8=option == "int8",
+                                message_callback=message_callback).load()
+        if detector.backend != backend:
+            report[spec] = {"skipped": "backend failed to load"}
+            continue
+        for image in images[:2]:
+            detector.predict(image, conf)
+        samples = []
+        predictions = []
+        for i in range(max(iterations, len(images))):
+            image = images[i % len(images)]
+            started = time.perf_counter()
+            detections = detector.predict(image, conf)
+            samples.append(time.perf_counter() - started)
+            if i < len(images):
+                predictions.append(detections)
+        ms = np.asarray(samples) * 1000.0
+        score = map50(reference, predictions)
+        report[spec] = {
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(ms, 95)), 3),
+            "map50_vs_pytorch": None if score is None else round(score, 4),
+            "detections": int(sum(len(p) for p in predictions)),
+        }
+    return report
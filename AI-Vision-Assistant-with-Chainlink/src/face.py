@@ -0,0 +1,252 @@
+import os
+import hashlib
+import threading
+import numpy as np
+from constants import FACE_MATCH_TOLERANCE
+
+class FaceGallery:
+    """Known face encodings kept in one contiguous float32 matrix.
+    
+    Rows are appended, overwritten in place by set(), or the buffers swapped
+    wholesale by reset(). A snapshot of the first `count` rows therefore
+    never loses rows while matching runs, though it sees a set() overwrite
+    of a row it already holds.
+    """
+    def __init__(self, dim=128, capacity=64):
+        self.dim = dim
+        self.lock = threading.Lock()
+        self._names = []
+        self._count = 0
+        self._encodings = np.zeros((capacity, dim), dtype=np.float32)
+        self._sq_norms = np.zeros(capacity, dtype=np.float32)
+    
+    def __len__(self):
+        return self._count
+    
+    @property
+    def names(self):
+        return self.snapshot()[0]
+    
+    @property
+    def encodings(self):
+        return self.snapshot()[1]
+    
+    def reset(self, encodings=(), names=()):
+        """Replace the whole gallery without disturbing concurrent readers"""
+        capacity = max(64, len(names))
+        fresh = FaceGallery(self.dim, capacity)
+        fresh.extend(encodings, names)
+        with self.lock:
+            self._encodings = fresh._encodings
+            self._sq_norms = fresh._sq_norms
+            self._names = fresh._names
+            self._count = fresh._count
+    
+    def add(self, encoding, name):
+        """Append one identity and return its row index"""
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        with self.lock:
+            return self._append(encoding, name)
+    
+    def set(self, encoding, name):
+        """Overwrite the row for name if it exists, otherwise append it"""
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        with self.lock:
+            names = self._names[:self._count]
+            if name in names:
+                index = names.index(name)
+                self._encodings[index] = encoding
+                self._sq_norms[index] = encoding @ encoding
+                return index
+            # Same critical section as the lookup, so two writers cannot both append name
+            return self._append(encoding, name)
+    
+    def extend(self, encodings, names):
+        """Append many identities with a single copy into the matrix"""
+        if not len(names):
+            return
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(len(names), self.dim)
+        with self.lock:
+            needed = self._count + len(names)
+            if needed > len(self._encodings):
+                self._grow(max(2 * self._count, needed, 64))
+            rows = slice(self._count, needed)
+            self._encodings[rows] = encodings
+            self._sq_norms[rows] = np.einsum("ij,ij->i", encodings, encodings)
+            self._names.extend(names)
+            self._count = needed
+    
+    def _append(self, encoding, name):
+        # Caller holds self.lock
+        if self._count == len(self._encodings):
+            self._grow(max(2 * self._count, 64))
+        index = self._count
+        self._encodings[index] = encoding
+        self._sq_norms[index] = encoding @ encoding
+        self._names.append(name)
+        self._count += 1
+        return index
+    
+    def _grow(self, capacity):
+        # Readers may still hold views of the old buffers, so copy instead of resizing in place
+        encodings = np.zeros((capacity, self.dim), dtype=np.float32)
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        encodings[:self._count] = self._encodings[:self._count]
+        sq_norms[:self._count] = self._sq_norms[:self._count]
+        self._encodings = encodings
+        self._sq_norms = sq_norms
+    
+    def snapshot(self):
+        """Consistent (names, encodings, squared norms) view of the current rows"""
+        with self.lock:
+            count = self._count
+            return self._names[:count], self._encodings[:count], self._sq_norms[:count]
+    
+    def distances(self, encodings, snapshot=None):
+        """Euclidean distances of shape (faces, identities) in one batched operation"""
+        _, gallery, gallery_sq = snapshot or self.snapshot()
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        
+        # |q - g|^2 = |q|^2 + |g|^2 - 2 q.g
+        squared = np.einsum("ij,ij->i", queries, queries)[:, None] + gallery_sq[None, :]
+        squared -= 2.0 * (queries @ gallery.T)
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
+    
+    def match(self, encodings, tolerance=FACE_MATCH_TOLERANCE, top_k=3):
+        """Match every face encoding of a frame against the whole gallery.
+        
+        Returns one dict per face with the best "name" ("Unknown" when no
+        identity is within tolerance), its "distance" (None when unknown)
+        and "candidates", the top_k closest (name, distance) pairs.
+        """
+        if not len(encodings):
+            return []
+        snapshot = self.snapshot()
+        names = snapshot[0]
+        if not names:
+            return [{"name": "Unknown", "distance": None, "candidates": []} for _ in encodings]
+        
+        distances = self.distances(encodings, snapshot)
+        k = min(top_k, len(names))
+        if k < len(names):
+            top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(names)), distances.shape)
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+        
+        matches = []
+        for indices, face_distances in zip(top, top_distances):
+            best_distance = float(face_distances[0])
+            known = best_distance <= tolerance
+            matches.append({
+                "name": names[indices[0]] if known else "Unknown",
+                "distance": best_distance if known else None,
+                "candidates": [(names[i], float(d)) for i, d in zip(indices, face_distances)],
+            })
+        return matches
+
+class EncodingCache:
+    """On-disk cache of face encodings for the images in KNOWN_FACES_DIR.
+    
+    Entries are keyed by file path and validated against the file's mtime
+    and size; when those changed the content hash decides whether the
+    stored encoding can still be reused. Images without a detectable face
+    are cached too (with no encoding) so they are not retried every start.
+    """
+    def __init__(self, path, dim=128):
+        self.path = path
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+    
+    def load(self):
+        entries = {}
+        if os.path.exists(self.path):
+            with np.load(self.path, allow_pickle=False) as data:
+                for path, mtime_ns, size, sha1, has_face, encoding in zip(
+                    data["paths"], data["mtimes"], data["sizes"], data["hashes"],
+                    data["has_face"], data["encodings"]
+                ):
+                    entries[str(path)] = {
+                        "mtime_ns": int(mtime_ns),
+                        "size": int(size),
+                        "sha1": str(sha1),
+                        "encoding": encoding.copy() if has_face else None,
+                    }
+        with self.lock:
+            self.entries = entries
+            self.dirty = False
+        return entries
+    
+    @staticmethod
+    def file_hash(path):
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def lookup(self, path):
+        """Return (hit, encoding) for path; encoding is None for face-less images"""
+        entry = self.entries.get(path)
+        if entry is None:
+            return False, None
+        stat = os.stat(path)
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return True, entry["encoding"]
+        if entry["sha1"] == self.file_hash(path):
+            # Touched but unchanged - refresh the stat key and keep the encoding
+            self.put(path, entry["encoding"], entry["sha1"])
+            return True, entry["encoding"]
+        return False, None
+    
+    def put(self, path, encoding, sha1=None):
+        stat = os.stat(path)
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": sha1 or self.file_hash(path),
+            "encoding": None if encoding is None else np.asarray(encoding, dtype=np.float32),
+        }
+        with self.lock:
+            self.entries[path] = entry
+            self.dirty = True
+    
+    def prune(self, keep_paths):
+        keep_paths = set(keep_paths)
+        with self.lock:
+            stale = [path for path in self.entries if path not in keep_paths]
+            for path in stale:
+                del self.entries[path]
+            self.dirty = self.dirty or bool(stale)
+    
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            items = list(self.entries.items())
+            self.dirty = False
+        
+        encodings = np.zeros((len(items), self.dim), dtype=np.float32)
+        for row, (_, entry) in enumerate(items):
+            if entry["encoding"] is not None:
+                encodings[row] = entry["encoding"]
+        
+        # Write next to the target and swap it in so a crash never leaves a torn cache
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                paths=np.array([path for path, _ in items], dtype=str),
+                mtimes=np.array([entry["mtime_ns"] for _, entry in items], dtype=np.int64),
+                sizes=np.array([entry["size"] for _, entry in items], dtype=np.int64),
+                hashes=np.array([entry["sha1"] for _, entry in items], dtype=str),
+                has_face=np.array([entry["encoding"] is not None for _, entry in items], dtype=bool),
+                encodings=encodings,
+            )
+        os.replace(tmp_path, self.path)
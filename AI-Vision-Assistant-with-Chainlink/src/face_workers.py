@@ -0,0 +1,142 @@
+import queue
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from constants import FACE_POOL_WARMUP_SECONDS
+
+# Per-worker state, populated by _init_worker in each child process
+_face_recognition = None
+_attached = {}
+
+def _init_worker(ready=None, timeout=None):
+    """Import dlib/face_recognition once per worker, warm its models up, then wait for the other workers"""
+    global _face_recognition
+    import face_recognition
+    _face_recognition = face_recognition
+    dummy = np.zeros((96, 96, 3), dtype=np.uint8)
+    face_recognition.face_locations(dummy, model="hog")
+    face_recognition.face_encodings(dummy, [(8, 88, 88, 8)])
+    if ready is not None:
+        try:
+            ready.wait(timeout)
+        except threading.BrokenBarrierError:
+            pass  # Reported by warm_up(); the worker is usable anyway
+
+def _attach(name):
+    shm = _attached.get(name)
+    if shm is None:
+        # Workers share the parent's resource tracker, so attaching never takes ownership
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return shm
+
+def _view(name, shape):
+    return np.ndarray(shape, dtype=np.uint8, buffer=_attach(name).buf)
+
+def _detect(name, shape, upsample):
+    rgb = _view(name, shape)
+    return _face_recognition.face_locations(rgb, model="hog", number_of_times_to_upsample=upsample)
+
+def _encode(name, shape, locations):
+    rgb = _view(name, shape)
+    return [np.asarray(e, dtype=np.float32) for e in _face_recognition.face_encodings(rgb, locations)]
+
+class SharedFrame:
+    """A frame copied into a pooled shared-memory block for worker access.
+    
+    Only the block name and shape cross the process boundary; the pixels
+    stay in shared memory. Release (or use as a context manager) once all
+    tasks for the frame are done so the block can be reused.
+    """
+    def __init__(self, pool, index, shape):
+        self.pool = pool
+        self.index = index
+        self.shape = shape
+        self.name = pool.blocks[index].name
+        self.array = np.ndarray(shape, dtype=np.uint8, buffer=pool.blocks[index].buf)
+    
+    def detect(self, upsample=1):
+        """Future resolving to HOG face locations"""
+        return self.pool.executor.submit(_detect, self.name, self.shape, upsample)
+    
+    def encode(self, locations):
+        """Future resolving to one float32 encoding per location"""
+        return self.pool.executor.submit(_encode, self.name, self.shape, list(locations))
+    
+    def release(self):
+        self.array = None
+        if self.index is not None:
+            self.pool.free.put(self.index)
+            self.index = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+class FaceAnalysisPool:
+    """Process pool running dlib face detection and encoding off the GIL"""
+    def __init__(self, processes, max_frame_bytes, buffers=None, message_callback=None):
+        self.message_callback = message_callback or print
+        self.processes = processes
+        buffers = buffers or 2 * processes
+        self.blocks = [shared_memory.SharedMemory(create=True, size=max_frame_bytes) for _ in range(buffers)]
+        self.free = queue.Queue()
+        for index in range(buffers):
+            self.free.put(index)
+        # Spawned workers never inherit Tk, camera or model state from the GUI process
+        context = mp.get_context("spawn")
+        self.ready = context.Barrier(processes)
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.ready, FACE_POOL_WARMUP_SECONDS)
+        )
+    
+    def warm_up(self):
+        """Block until every worker has imported and initialised its models.
+        
+        One task per process makes the executor start all of them, and the
+        barrier at the end of _init_worker holds each worker until every one
+        has run a detection and an encoding, so no worker can drain the
+        tasks early.
+        """
+        futures = [self.executor.submit(int, 0) for _ in range(self.processes)]
+        for future in futures:
+            future.result()
+        if self.ready.broken:
+            self.message_callback(
+                f"⚠️ Face analysis pool started, but not every worker loaded its models within {FACE_POOL_WARMUP_SECONDS}s"
+            )
+            return
+        self.message_callback(f"✅ Face analysis pool ready ({self.processes} processes)")
+    
+    def fits(self, shape):
+        return bool(self.blocks) and int(np.prod(shape)) <= self.blocks[0].size
+    
+    def allocate(self, shape, timeout=None):
+        """Reserve a free shared block; write pixels into SharedFrame.array"""
+        if not self.fits(shape):
+            raise ValueError(f"Frame of shape {shape} exceeds shared block size")
+        index = self.free.get(timeout=timeout)
+        return SharedFrame(self, index, tuple(shape))
+    
+    def share(self, rgb_frame, timeout=None):
+        """Copy rgb_frame into a free shared block and return a SharedFrame"""
+        shared = self.allocate(rgb_frame.shape, timeout)
+        shared.array[...] = rgb_frame
+        return shared
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for block in self.blocks:
+            try:
+                block.close()
+                block.unlink()
+            except Exception:
+                pass
+        self.blocks = []
@@ -0,0 +1,163 @@
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+
+# Slot states
+FREE = 0
+WRITING = 1
+READY = 2
+PROCESSING = 3
+DONE = 4
+DISPLAYING = 5
+
+META_DTYPE = np.dtype([("frame_id", np.int64), ("timestamp", np.float64), ("state", np.int32)])
+
+class FrameRing:
+    """Fixed-size ring of raw frames backed by multiprocessing.shared_memory.
+    
+    Pixels live in one shared block and per-slot metadata (frame id,
+    timestamp, state) in another, so capture, analysis and rendering -
+    in threads or in other processes via attach() - exchange slot
+    indices instead of copying frames. Slots move through
+    FREE -> WRITING -> READY -> PROCESSING -> DONE -> DISPLAYING -> FREE;
+    a READY or DONE slot that is superseded before anyone takes it is
+    recycled and counted as dropped. Once closed, every slot operation is
+    a no-op returning None.
+    """
+    def __init__(self, slots, shape, name=None, create=True, lock=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.frame_bytes = int(np.prod(self.shape))
+        self.owner = create
+        self.lock = lock or threading.Lock()
+        self.dropped = 0
+        
+        meta_name = f"{name}_meta" if name else None
+        self.data_shm = shared_memory.SharedMemory(name=name, create=create, size=slots * self.frame_bytes)
+        self.meta_shm = shared_memory.SharedMemory(
+            name=meta_name or f"{self.data_shm.name}_meta", create=create, size=slots * META_DTYPE.itemsize
+        )
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.data_shm.buf)
+        self.meta = np.ndarray(slots, dtype=META_DTYPE, buffer=self.meta_shm.buf)
+        if create:
+            self.meta["frame_id"] = -1
+            self.meta["timestamp"] = 0.0
+            self.meta["state"] = FREE
+    
+    @classmethod
+    def attach(cls, name, slots, shape, lock=None):
+        """Open an existing ring from another process"""
+        return cls(slots, shape, name=name, create=False, lock=lock)
+    
+    @property
+    def name(self):
+        return self.data_shm.name
+    
+    def frame(self, index):
+        """Writable view of a slot's pixels (no copy)"""
+        return self.frames[index]
+    
+    def _newest(self, state):
+        candidates = np.flatnonzero(self.meta["state"] == state)
+        if not len(candidates):
+            return None
+        return int(candidates[np.argmax(self.meta["frame_id"][candidates])])
+    
+    @property
+    def closed(self):
+        return self.meta is None
+    
+    def acquire_write(self):
+        """Claim a slot for the next capture, recycling the oldest unclaimed frame if needed"""
+        with self.lock:
+            if self.closed:
+                return None
+            states = self.meta["state"]
+            free = np.flatnonzero(states == FREE)
+            if len(free):
+                index = int(free[0])
+            else:
+                stale = np.flatnonzero((states == READY) | (states == DONE))
+                if not len(stale):
+                    return None
+                index = int(stale[np.argmin(self.meta["frame_id"][stale])])
+                self.dropped += int(states[index] == READY)
+            states[index] = WRITING
+            return index
+    
+    def publish(self, index, frame_id, timestamp):
+        with self.lock:
+            if self.closed:
+                return
+            self.meta[index] = (frame_id, timestamp, READY)
+    
+    def abandon(self, index):
+        with self.lock:
+            if self.closed:
+                return
+            self.meta["state"][index] = FREE
+    
+    def acquire_latest(self):
+        """Take the newest READY slot for analysis and recycle older READY ones"""
+        with self.lock:
+            if self.closed:
+                return None
+            index = self._newest(READY)
+            if index is None:
+                return None
+            states = self.meta["state"]
+            older = np.flatnonzero((states == READY) & (self.meta["frame_id"] < self.meta["frame_id"][index]))
+            states[older] = FREE
+            self.dropped += len(older)
+            states[index] = PROCESSING
+            return index
+    
+    def mark_done(self, index):
+        """Analysis finished; keep the slot only if it is the newest finished frame"""
+        with self.lock:
+            if self.closed:
+                return False
+            states = self.meta["state"]
+            frame_ids = self.meta["frame_id"]
+            done = np.flatnonzero(states == DONE)
+            if len(done) and frame_ids[done].max() > frame_ids[index]:
+                # A newer frame already finished on another worker
+                states[index] = FREE
+                self.dropped += 1
+                return False
+            states[done] = FREE
+            states[index] = DONE
+            return True
+    
+    def acquire_display(self, after_frame_id=-1):
+        """Take the newest DONE slot newer than after_frame_id for rendering"""
+        with self.lock:
+            if self.closed:
+                return None
+            index = self._newest(DONE)
+            if index is None or self.meta["frame_id"][index] <= after_frame_id:
+                return None
+            self.meta["state"][index] = DISPLAYING
+            return index
+    
+    def release(self, index):
+        with self.lock:
+            if self.closed:
+                return
+            self.meta["state"][index] = FREE
+    
+    def close(self):
+        # Drop numpy views before closing the mapping
+        with self.lock:
+            self.frames = None
+            self.meta = None
+        for shm in (self.data_shm, self.meta_shm):
+            try:
+                shm.close()
+            except BufferError:
+                pass  # A view is still alive somewhere; the mapping goes away with it
+            if self.owner:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
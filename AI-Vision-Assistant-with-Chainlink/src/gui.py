@@ -1,14 +1,65 @@
+import queue
+import threading
+import time
 import tkinter as tk
+from datetime import datetime
 from tkinter import scrolledtext, simpledialog, messagebox, Toplevel, filedialog
 from PIL import Image, ImageTk
 import cv2
-from constants import VRF_SUBSCRIPTION_ID
+import numpy as np
+from constants import VRF_SUBSCRIPTION_ID, DISPLAY_FPS, MESSAGE_FLUSH_MS, METRICS_STATUS_MS
+from metrics import Metrics
+
+class FrameConverter:
+    """BGR frame -> display-sized RGB PIL image using preallocated buffers"""
+    def __init__(self, max_width=800, max_height=600):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.size = None
+        self.resized_buffer = None
+        self.rgb_buffer = None
+    
+    def convert(self, frame):
+        height, width = frame.shape[:2]
+        if width > self.max_width or height > self.max_height:
+            scale = min(self.max_width/width, self.max_height/height)
+            size = (int(width * scale), int(height * scale))
+        else:
+            size = (width, height)
+        
+        if size != self.size:
+            self.size = size
+            self.resized_buffer = None
+            self.rgb_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        
+        # Resize and convert into the buffers, then wrap them without copying
+        source = frame
+        if size != (width, height):
+            self.resized_buffer = cv2.resize(frame, size, dst=self.resized_buffer)
+            source = self.resized_buffer
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        return Image.frombuffer("RGB", size, self.rgb_buffer, "raw", "RGB", 0, 1)
 
 class AppGUI:
-    def __init__(self, root, message_callback=None):
+    def __init__(self, root, message_callback=None, metrics=None):
         self.root = root
         self.message_callback = message_callback or print
+        self.metrics = metrics or Metrics()
+        self.main_thread = threading.current_thread()
+        
+        # Worker threads never touch Tk directly: messages and UI calls are queued
+        # and flushed in batches on the main loop
+        self.message_queue = queue.SimpleQueue()
+        self.call_queue = queue.SimpleQueue()
+        
+        # Persistent video surface, re-created only when the display size changes
+        self.frame_source = None
+        self.video_photo = None
+        self.video_size = None
+        self.frame_converter = FrameConverter()
+        
         self.setup_gui()
+        self.flush_queues()
     
     def setup_gui(self):
         self.root.title("Full AI Vision Assistant with Chainlink")
@@ -30,6 +81,9 @@ class AppGUI:
         # Video controls
         video_controls = tk.Frame(left_panel, bg='#34495e')
         video_controls.pack(fill="x", padx=10, pady=10)
+        self.video_controls = video_controls
+        self.stream_var = tk.StringVar()
+        self.stream_names = []
         
         self.camera_btn = tk.Button(video_controls, text="📷 Start Camera", 
                                   bg='#27ae60', fg='white',
@@ -66,10 +120,24 @@ class AppGUI:
                                       bg='#2c3e50', fg='#ecf0f1', font=("Arial", 10))
         self.btc_price_label.pack(anchor="w", padx=5, pady=2)
         
+        self.wallet_label = tk.Label(data_frame, text="Wallet: Loading...", 
+                                   bg='#2c3e50', fg='#ecf0f1', font=("Arial", 10))
+        self.wallet_label.pack(anchor="w", padx=5, pady=2)
+        
+        # The subscription is fixed, so its label never changes
+        tk.Label(data_frame, text=f"VRF Sub ID: {VRF_SUBSCRIPTION_ID[:10]}...", 
+                bg='#2c3e50', fg='#ecf0f1', font=("Arial", 10)).pack(anchor="w", padx=5, pady=2)
+        
         self.vrf_status_label = tk.Label(data_frame, text="VRF Status: Ready", 
                                        bg='#2c3e50', fg='#ecf0f1', font=("Arial", 10))
         self.vrf_status_label.pack(anchor="w", padx=5, pady=2)
         
+        # One line per mint job, updated as it moves through its stages
+        self.mint_jobs_list = tk.Listbox(data_frame, height=4, bg='#2c3e50', fg='#ecf0f1',
+                                        font=("Consolas", 9), relief='flat', highlightthickness=0)
+        self.mint_jobs_list.pack(fill="x", padx=5, pady=2)
+        self.mint_job_rows = {}
+        
         # Chat components
         self.chat_display = scrolledtext.ScrolledText(
             right_panel, height=25, width=65, bg='#2c3e50', fg='#ecf0f1',
@@ -113,39 +181,139 @@ class AppGUI:
         self.add_message("System", "🚀 AI Vision Assistant with Chainlink Ready!")
     
     def add_message(self, sender, message):
-        from datetime import datetime
+        """Queue a chat line; safe to call from any thread"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.chat_display.config(state=tk.NORMAL)
-        self.chat_display.insert(tk.END, f"[{timestamp}] {sender}: {message}\n")
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
+        self.message_queue.put(f"[{timestamp}] {sender}: {message}\n")
+    
+    def call_on_main(self, func, *args):
+        """Run func(*args) on the Tk main loop; safe to call from any thread"""
+        if threading.current_thread() is self.main_thread:
+            func(*args)
+        else:
+            self.call_queue.put((func, args))
+    
+    def set_status(self, text):
+        """Status bar text; safe to call from any thread"""
+        self.call_on_main(lambda: self.status_label.config(text=text))
+    
+    def set_vrf_status(self, text):
+        self.call_on_main(lambda: self.vrf_status_label.config(text=text))
+    
+    def set_mint_job(self, job_id, text):
+        """Add or update a mint job's line; safe to call from any thread"""
+        def update():
+            row = self.mint_job_rows.get(job_id)
+            if row is None:
+                row = self.mint_job_rows[job_id] = self.mint_jobs_list.size()
+            else:
+                self.mint_jobs_list.delete(row)
+            self.mint_jobs_list.insert(row, text)
+            self.mint_jobs_list.see(row)
+        self.call_on_main(update)
+    
+    def flush_queues(self):
+        """Drain queued UI calls and chat lines in one batch"""
+        while True:
+            try:
+                func, args = self.call_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"UI update error: {e}")
+        
+        lines = []
+        while True:
+            try:
+                lines.append(self.message_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self.chat_display.config(state=tk.NORMAL)
+            self.chat_display.insert(tk.END, "".join(lines))
+            self.chat_display.config(state=tk.DISABLED)
+            self.chat_display.see(tk.END)
+        
+        self.root.after(MESSAGE_FLUSH_MS, self.flush_queues)
+    
+    def set_streams(self, names, on_select):
+        """Add a camera selector when more than one stream is configured"""
+        self.stream_names = list(names)
+        if len(self.stream_names) < 2:
+            return
+        self.stream_var.set(self.stream_names[0])
+        self.stream_menu = tk.OptionMenu(
+            self.video_controls, self.stream_var, *self.stream_names,
+            command=lambda name: on_select(self.stream_names.index(name))
+        )
+        self.stream_menu.config(bg='#8e44ad', fg='white', font=("Arial", 11, "bold"), relief='flat')
+        self.stream_menu.pack(side="left", padx=5)
+    
+    def select_stream(self, index):
+        if index < len(self.stream_names):
+            self.call_on_main(self.stream_var.set, self.stream_names[index])
+    
+    def start_render_loop(self, frame_source):
+        """Render the newest frame on the main thread at DISPLAY_FPS.
+        
+        frame_source() returns (frame, release) or None; release() is
+        called once the frame has been pasted, so the caller can reuse it.
+        """
+        self.frame_source = frame_source
+        self.render_tick()
+        self.update_status()
+    
+    def stop_render_loop(self):
+        self.frame_source = None
+        self.status_label.config(text="Ready")
+    
+    def update_status(self):
+        """Show live FPS, stage latencies and dropped frames while video runs"""
+        if self.frame_source is None:
+            return
+        try:
+            self.status_label.config(text=self.metrics.status_text())
+        except Exception as e:
+            pass
+        self.root.after(METRICS_STATUS_MS, self.update_status)
+    
+    def render_tick(self):
+        source = self.frame_source
+        if source is None:
+            return
+        shown = source()
+        if shown:
+            frame, release = shown
+            started = time.perf_counter()
+            try:
+                self.update_video_display(frame)
+            finally:
+                release()
+            self.metrics.record("render", time.perf_counter() - started)
+            self.metrics.tick("display")
+        self.root.after(max(1, int(1000 / DISPLAY_FPS)), self.render_tick)
     
     def update_video_display(self, frame):
+        """Paste a BGR frame into the persistent video PhotoImage (main thread only)"""
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            height, width = rgb_frame.shape[:2]
-            max_width = 800
-            max_height = 600
-            
-            if width > max_width or height > max_height:
-                scale = min(max_width/width, max_height/height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                rgb_frame = cv2.resize(rgb_frame, (new_width, new_height))
-            
-            img = Image.fromarray(rgb_frame)
-            imgtk = ImageTk.PhotoImage(image=img)
-            self.video_label.config(image=imgtk)
-            self.video_label.image = imgtk
+            img = self.frame_converter.convert(frame)
+            if img.size != self.video_size:
+                self.video_size = img.size
+                self.video_photo = ImageTk.PhotoImage(Image.new("RGB", img.size))
+                self.video_label.config(image=self.video_photo)
+                self.video_label.image = self.video_photo
+            self.video_photo.paste(img)
             
         except Exception as e:
             pass
     
-    def update_crypto_prices(self, eth_price, btc_price):
-        if eth_price and btc_price:
-            self.eth_price_label.config(text=f"ETH/USD: ${eth_price:,.2f}")
-            self.btc_price_label.config(text=f"BTC/USD: ${btc_price:,.2f}")
-            self.vrf_status_label.config(text=f"VRF Sub ID: {VRF_SUBSCRIPTION_ID[:10]}...")
+    def update_dashboard(self, state):
+        """Show a BlockchainManager.get_dashboard_state() result"""
+        self.eth_price_label.config(text=f"ETH/USD: ${state['eth_usd']:,.2f}")
+        self.btc_price_label.config(text=f"BTC/USD: ${state['btc_usd']:,.2f}")
+        registered = "registered ✅" if state["registered"] else "not registered"
+        self.wallet_label.config(text=f"Wallet: {registered} | {state['token_counter']} NFTs minted")
     
     def display_sketch_window(self, sketch, filename, nft_callback=None, save_callback=None):
         sketch_window = Toplevel(self.root)
@@ -1,56 +1,232 @@
+import os
+import json
+import time
+import random
+import threading
 import cv2
 import requests
-from constants import IPFS_PROJECT_ID, IPFS_SECRET
+from concurrent.futures import ThreadPoolExecutor
+from constants import (
+    IPFS_PROJECT_ID, IPFS_SECRET, PINATA_API_URL, IPFS_CONNECT_TIMEOUT, IPFS_READ_TIMEOUT,
+    IPFS_MAX_RETRIES, IPFS_BACKOFF_SECONDS, IPFS_UPLOAD_WORKERS, IPFS_CID_VERSION, IPFS_PIN_CACHE
+)
+from rpc import pooled_session
+from cid import compute_cid
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class PinataError(Exception):
+    def __init__(self, message, status=None):
+        self.status = status
+        super().__init__(message)
+
+class PinataClient:
+    """Pinata pinning API over one keep-alive session.
+    
+    Every request has a connect/read timeout. Rate limits (429), server
+    errors and dropped connections are retried with exponential backoff
+    and jitter, honouring Retry-After when Pinata sends it. base_url can
+    point at a local HTTP stand-in exposing the same two endpoints.
+    """
+    def __init__(self, api_key, secret, base_url=PINATA_API_URL, session=None,
+                 timeout=(IPFS_CONNECT_TIMEOUT, IPFS_READ_TIMEOUT), max_retries=IPFS_MAX_RETRIES,
+                 backoff=IPFS_BACKOFF_SECONDS, workers=IPFS_UPLOAD_WORKERS):
+        self.base_url = base_url.rstrip("/")
+        self.session = session or pooled_session(workers)
+        self.session.headers.update({"pinata_api_key": api_key or "", "pinata_secret_api_key": secret or ""})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.workers = workers
+    
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+    
+    def _post(self, path, **kwargs):
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise PinataError(f"Pinata request failed: {str(e)}")
+                time.sleep(self._delay(attempt))
+                continue
+            
+            if response.status_code == 200:
+                try:
+                    return response.json()["IpfsHash"]
+                except (ValueError, KeyError, TypeError) as e:
+                    raise PinataError(f"Unexpected Pinata response: {str(e)}", response.status_code)
+            if response.status_code not in RETRY_STATUS or last_attempt:
+                raise PinataError(f"Pinata returned {response.status_code}", response.status_code)
+            time.sleep(self._delay(attempt, response))
+    
+    def pin_file(self, data, filename="sketch.png", content_type="image/png", cid_version=IPFS_CID_VERSION):
+        # Pin with an explicit cidVersion so the result matches compute_cid
+        options = {"pinataOptions": json.dumps({"cidVersion": cid_version})}
+        return self._post("/pinning/pinFileToIPFS", files={"file": (filename, data, content_type)}, data=options)
+    
+    def pin_json(self, content):
+        return self._post("/pinning/pinJSONToIPFS", json=content)
+    
+    def pin_files(self, files):
+        """files: [(data, filename, content_type)] -> [hash or PinataError] in the same order"""
+        def pin(item):
+            try:
+                return self.pin_file(*item)
+            except PinataError as e:
+                return e
+            except Exception as e:
+                # One bad item must not fail the rest of the batch
+                return PinataError(f"Pinata request failed: {str(e)}")
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(pin, files))
+
+class PinCache:
+    """Local CIDs already pinned from this machine, persisted as a small JSON file.
+    
+    Entries are keyed by the locally computed CID and record the hash
+    Pinata returned for it, which is what callers get back on a hit.
+    """
+    def __init__(self, path=IPFS_PIN_CACHE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pins = {}
+        try:
+            with open(path, "r") as f:
+                self.pins = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def __contains__(self, cid):
+        with self.lock:
+            return cid in self.pins
+    
+    def get(self, cid):
+        """Pinned hash for a local CID, or None if it was never pinned"""
+        with self.lock:
+            entry = self.pins.get(cid)
+        return entry.get("ipfs_hash", cid) if entry is not None else None
+    
+    def add(self, cid, filename, ipfs_hash=None):
+        with self.lock:
+            self.pins[cid] = {"name": filename, "ipfs_hash": ipfs_hash or cid, "pinned_at": time.time()}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.pins, f)
+            os.replace(tmp_path, self.path)
 
 class IPFSManager:
     def __init__(self, message_callback=None):
         self.message_callback = message_callback or print
+        self.client = PinataClient(IPFS_PROJECT_ID, IPFS_SECRET)
+        self.pin_cache = PinCache()
+        self.executor = ThreadPoolExecutor(max_workers=IPFS_UPLOAD_WORKERS)
+    
+    def pin_bytes(self, data, filename, content_type):
+        """Pin data unless its locally computed CID was pinned before; returns the CID"""
+        cid = compute_cid(data, IPFS_CID_VERSION)
+        pinned = self.pin_cache.get(cid)
+        if pinned:
+            self.message_callback(f"♻️ Already pinned, skipping upload: {pinned}")
+            return pinned
+        
+        ipfs_hash = self.client.pin_file(data, filename, content_type)
+        if ipfs_hash != cid:
+            self.message_callback(f"⚠️ Pinata returned {ipfs_hash}, expected {cid}")
+        # Keyed by the local CID, which is what the next lookup computes
+        self.pin_cache.add(cid, filename, ipfs_hash)
+        return ipfs_hash
+    
+    def submit_pin(self, data, filename, content_type):
+        """pin_bytes on the upload pool; returns a Future for the CID"""
+        return self.executor.submit(self.pin_bytes, data, filename, content_type)
     
     def upload_image_to_ipfs(self, image):
         try:
             _, buffer = cv2.imencode('.png', image)
-            file_bytes = buffer.tobytes()
-            
-            url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-            files = {'file': ('sketch.png', file_bytes, 'image/png')}
-            headers = {
-                'pinata_api_key': IPFS_PROJECT_ID,
-                'pinata_secret_api_key': IPFS_SECRET
-            }
-            
-            response = requests.post(url, files=files, headers=headers)
-            
-            if response.status_code == 200:
-                ipfs_hash = response.json()['IpfsHash']
-                self.message_callback(f"📁 Image uploaded to IPFS: {ipfs_hash}")
-                return ipfs_hash
-            else:
-                self.message_callback(f"❌ IPFS upload failed: {response.status_code}")
-                return None
+            ipfs_hash = self.pin_bytes(buffer.tobytes(), "sketch.png", "image/png")
+            self.message_callback(f"📁 Image uploaded to IPFS: {ipfs_hash}")
+            return ipfs_hash
                 
+        except PinataError as e:
+            self.message_callback(f"❌ IPFS upload failed: {str(e)}")
+            return None
         except Exception as e:
             self.message_callback(f"❌ IPFS upload error: {str(e)}")
             return None
     
+    def upload_images_to_ipfs(self, images):
+        """Pin many images concurrently; returns hashes in order, None for failures"""
+        files = []
+        for i, image in enumerate(images):
+            _, buffer = cv2.imencode('.png', image)
+            files.append((buffer.tobytes(), f"sketch_{i}.png", "image/png"))
+        
+        # Only upload files whose CID has not been pinned before
+        cids = [compute_cid(data, IPFS_CID_VERSION) for data, _, _ in files]
+        hashes = [self.pin_cache.get(cid) for cid in cids]
+        todo = [i for i, pinned in enumerate(hashes) if pinned is None]
+        for i, ipfs_hash in zip(todo, self.client.pin_files([files[i] for i in todo])):
+            if isinstance(ipfs_hash, PinataError):
+                self.message_callback(f"❌ IPFS upload failed: {str(ipfs_hash)}")
+                ipfs_hash = None
+            else:
+                self.pin_cache.add(cids[i], files[i][1], ipfs_hash)
+            hashes[i] = ipfs_hash
+        self.message_callback(f"📁 Uploaded {sum(h is not None for h in hashes)}/{len(hashes)} images to IPFS")
+        return hashes
+    
     def upload_metadata_to_ipfs(self, metadata):
         try:
-            url = "https://api.pinata.cloud/pinning/pinJSONToIPFS"
-            headers = {
-                'Content-Type': 'application/json',
-                'pinata_api_key': IPFS_PROJECT_ID,
-                'pinata_secret_api_key': IPFS_SECRET
-            }
-            
-            response = requests.post(url, json=metadata, headers=headers)
-            
-            if response.status_code == 200:
-                ipfs_hash = response.json()['IpfsHash']
-                self.message_callback(f"📝 Metadata uploaded to IPFS: {ipfs_hash}")
-                return ipfs_hash
-            else:
-                self.message_callback(f"❌ Metadata upload failed: {response.status_code}")
-                return None
+            # Pinned as a file so the CID can be computed and deduplicated locally
+            ipfs_hash = self.pin_bytes(json.dumps(metadata).encode(), "metadata.json", "application/json")
+            self.message_callback(f"📝 Metadata uploaded to IPFS: {ipfs_hash}")
+            return ipfs_hash
                 
+        except PinataError as e:
+            self.message_callback(f"❌ Metadata upload failed: {str(e)}")
+            return None
         except Exception as e:
             self.message_callback(f"❌ Metadata upload error: {str(e)}")
             return None
+    
+    def upload_sketch_with_metadata(self, image, build_metadata):
+        """Pin an image and the metadata built from its CID at the same time.
+        
+        build_metadata(image_cid) -> dict. The image CID is computed locally,
+        so the metadata upload does not wait for the image upload. Returns
+        (image_hash, metadata_hash), or (None, None) on failure.
+        """
+        try:
+            _, buffer = cv2.imencode('.png', image)
+            data = buffer.tobytes()
+            image_cid = compute_cid(data, IPFS_CID_VERSION)
+            metadata = build_metadata(image_cid)
+            
+            image_future = self.submit_pin(data, "sketch.png", "image/png")
+            metadata_future = self.submit_pin(json.dumps(metadata).encode(), "metadata.json", "application/json")
+            image_hash = image_future.result()
+            metadata_hash = metadata_future.result()
+            
+            if image_hash != image_cid:
+                # Local CID was wrong; re-pin metadata pointing at what Pinata actually stored
+                metadata_hash = self.pin_bytes(
+                    json.dumps(build_metadata(image_hash)).encode(), "metadata.json", "application/json"
+                )
+            self.message_callback(f"📁 Image uploaded to IPFS: {image_hash}")
+            self.message_callback(f"📝 Metadata uploaded to IPFS: {metadata_hash}")
+            return image_hash, metadata_hash
+            
+        except PinataError as e:
+            self.message_callback(f"❌ IPFS upload failed: {str(e)}")
+            return None, None
+        except Exception as e:
+            self.message_callback(f"❌ IPFS upload error: {str(e)}")
+            return None, None
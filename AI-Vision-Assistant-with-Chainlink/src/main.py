@@ -1,7 +1,9 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
 import os
 import cv2
 import threading
-import time
 import requests
 import io
 from datetime import datetime
@@ -18,6 +20,11 @@ from vision_processing import VisionProcessor
 from speech import SpeechProcessor
 from art_generation import ArtGenerator
 from gui import AppGUI
+from pipeline import VideoPipeline
+from metrics import Metrics, MetricsExporter
+from streams import StreamContext, FairInferenceScheduler, parse_camera_source
+from startup import StartupReport, BackgroundWarmup
+from mint_queue import MintQueue, STAGE_LABELS
 
 # Set up environment
 os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
@@ -26,35 +33,73 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 class FullAIVisionAssistant:
     def __init__(self):
         import tkinter as tk
-        self.root = tk.Tk()
-        
-        # Initialize GUI first
-        self.gui = AppGUI(self.root, self.add_message)
+        self.startup = StartupReport(STARTUP_STARTED)
+        self.startup.record("imports", time.perf_counter() - STARTUP_STARTED)
+        with self.startup.timed("window"):
+            self.root = tk.Tk()
+            self.metrics = Metrics()
+            
+            # Initialize GUI first
+            self.gui = AppGUI(self.root, self.add_message, metrics=self.metrics)
         
         # Create system message callback
         def system_callback(msg):
             self.add_message("System", msg)
         
-        # Initialize all components with wrapped callback
-        self.blockchain = BlockchainManager(system_callback)
+        # Components are constructed unloaded; models, gallery, RPC and audio
+        # come up in the background once the window is on screen
+        self.blockchain = BlockchainManager(system_callback, connect=False)
+        self.chain_state = None
         self.ipfs = IPFSManager(system_callback)
-        self.vision = VisionProcessor(system_callback)
-        self.speech = SpeechProcessor(system_callback)
+        self.vision = VisionProcessor(system_callback, metrics=self.metrics, load=False)
+        self.speech = SpeechProcessor(system_callback, setup=False)
         self.art = ArtGenerator(system_callback)
+        self.mint_queue = MintQueue(
+            self.ipfs, self.blockchain, progress_callback=self.show_mint_progress, message_callback=system_callback
+        )
+        
+        self.warmup = BackgroundWarmup(self.startup, self.show_warmup_progress, system_callback)
+        self.warmup.add("YOLO", self.vision.load_models)
+        self.warmup.add("face workers", self.vision.start_face_pool)
+        self.warmup.add("known faces", self.vision.load_known_faces)
+        self.warmup.add("blockchain", self.blockchain.setup_blockchain)
+        self.warmup.add("speech", self.speech.setup_speech)
+        self.warmup.add("mint queue", self.mint_queue.resume)
         
-        # Video capture
-        self.cap = None
+        # Local metrics surface for operators (disabled unless configured)
+        self.metrics_exporter = MetricsExporter(
+            self.metrics, port=METRICS_PORT, path=METRICS_FILE, message_callback=system_callback
+        )
+        self.metrics_exporter.start()
+        
+        # Video capture: one StreamContext per camera, all sharing the loaded models
+        self.streams = [StreamContext(i, parse_camera_source(source)) for i, source in enumerate(CAMERA_SOURCES)]
+        self.active_stream = self.streams[0]
+        self.inference_scheduler = FairInferenceScheduler(VISION_WORKERS)
         self.video_running = False
         self.frame_lock = threading.Lock()
-        self.last_detection_time = {}
-        self.unknown_face_cooldown = {}
+        self.gui.set_streams([stream.name for stream in self.streams], self.switch_stream)
         
         # Bind GUI events
         self.setup_gui_events()
         
-        # Start periodic updates
-        self.update_crypto_prices()
+        # Warm up once Tk has drawn the window
+        self.root.after_idle(self.start_warmup)
         
+    def start_warmup(self):
+        self.startup.milestone("window shown")
+        self.warmup.start()
+    
+    def show_warmup_progress(self, done, total, name):
+        """Called from the warm-up thread before each task and when all are done"""
+        if name:
+            self.gui.set_status(f"⏳ Loading {name} ({done + 1}/{total})...")
+            return
+        self.gui.set_status("Ready")
+        self.add_message("System", self.startup.summary())
+        # Price feeds need the RPC connection
+        self.gui.call_on_main(self.update_dashboard)
+    
     def setup_gui_events(self):
         self.gui.camera_btn.config(command=self.toggle_camera)
         self.gui.register_btn.config(command=self.manual_register_face)
@@ -69,65 +114,127 @@ class FullAIVisionAssistant:
     
     def toggle_camera(self):
         if not self.video_running:
-            self.cap = cv2.VideoCapture(0)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 960)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 540)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-            
-            if self.cap.isOpened():
+            if not (self.warmup.is_ready("known faces") and self.warmup.is_ready("YOLO")):
+                self.add_message("System", "⏳ Models are still loading, please try again in a moment")
+                return
+            opened = [stream for stream in self.streams if self.open_stream(stream)]
+            if opened:
                 self.video_running = True
                 self.gui.camera_btn.config(text="🛑 Stop Camera", bg='#e74c3c')
-                self.video_thread = threading.Thread(target=self.video_loop, daemon=True)
-                self.video_thread.start()
-                self.add_message("System", "📹 Camera started")
+                if self.active_stream not in opened:
+                    self.switch_stream(opened[0].id)
+                self.gui.start_render_loop(self.next_display_frame)
+                self.add_message("System", f"📹 Camera started ({len(opened)}/{len(self.streams)} streams)")
         else:
             self.video_running = False
-            if self.cap:
-                self.cap.release()
+            self.gui.stop_render_loop()
+            for stream in self.streams:
+                self.close_stream(stream)
             cv2.destroyAllWindows()
             self.gui.camera_btn.config(text="📷 Start Camera", bg='#27ae60')
             self.add_message("System", "📹 Camera stopped")
     
-    def video_loop(self):
-        while self.video_running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            processed_frame, face_count = self.vision.process_frame(frame.copy())
-            self.gui.update_video_display(processed_frame)
-            
-            # Auto-detect unknown faces and offer registration
-            self.check_for_unknown_faces(frame, face_count)
-            time.sleep(0.02)
+    def open_stream(self, stream):
+        """Open one camera and start its capture/inference pipeline"""
+        stream.cap = cv2.VideoCapture(stream.source)
+        stream.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 960)
+        stream.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 540)
+        stream.cap.set(cv2.CAP_PROP_FPS, 30)
+        # Keep the driver queue short so captured frames are always fresh
+        stream.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        if not stream.cap.isOpened():
+            stream.cap.release()
+            stream.cap = None
+            self.add_message("System", f"⚠️ {stream.name} ({stream.source}) could not be opened")
+            return False
+        
+        # Inference goes through the shared scheduler so every stream gets a fair share of the models
+        stream.pipeline = VideoPipeline(
+            stream.cap,
+            lambda frame: self.inference_scheduler.run(stream.id, self.vision.analyze_frame, frame, stream),
+            result_callback=lambda frame, result: self.check_for_unknown_faces(stream, frame, result),
+            annotate_fn=self.vision.annotate_frame,
+            workers=max(1, VISION_WORKERS // len(self.streams)),
+            message_callback=lambda msg: self.add_message("System", f"[{stream.name}] {msg}"),
+            metrics=self.metrics,
+            stream_id=stream.id
+        )
+        stream.pipeline.start()
+        stream.displayed_frame_id = -1
+        return True
+    
+    def close_stream(self, stream):
+        if stream.pipeline:
+            stream.pipeline.stop()
+            stream.pipeline = None
+        if stream.cap:
+            stream.cap.release()
+            stream.cap = None
     
-    def check_for_unknown_faces(self, frame, face_count):
-        """Check for unknown faces and offer registration"""
+    def switch_stream(self, stream_id):
+        """Show another camera; all streams keep being analysed in the background"""
+        self.active_stream = self.streams[stream_id]
+        self.active_stream.displayed_frame_id = -1
+        self.gui.select_stream(stream_id)
+    
+    def next_display_frame(self):
+        """Newest annotated frame of the active stream for the GUI render loop, as (frame, release)"""
+        stream = self.active_stream
+        pipeline = stream.pipeline
+        if not self.video_running or not pipeline:
+            return None
+        shown = pipeline.acquire_display(stream.displayed_frame_id)
+        if not shown:
+            return None
+        index, frame_id, frame = shown
+        stream.displayed_frame_id = frame_id
+        return frame, lambda: pipeline.release_display(index)
+    
+    def current_frame(self):
+        """Copy of a fresh, unannotated frame from the active stream's capture thread"""
+        if self.active_stream.pipeline:
+            return self.active_stream.pipeline.capture_snapshot()
+        return None
+    
+    def check_for_unknown_faces(self, stream, frame, result):
+        """Greet known faces and offer registration for unknown ones.
+        
+        Reuses the boxes and identities from process_frame, so no frame
+        needs a second face detection/encoding pass. Greetings and
+        registration cooldowns live on the stream and are keyed by its
+        tracker IDs, so a person keeps the same key however the faces in
+        the frame are ordered, and cameras never share track state.
+        """
         try:
-            import face_recognition
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            face_locations = face_recognition.face_locations(rgb_frame)
-            face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-            
             current_time = time.time()
             
-            for i, (face_encoding, (top, right, bottom, left)) in enumerate(zip(face_encodings, face_locations)):
-                matches = face_recognition.compare_faces(self.vision.known_face_encodings, face_encoding, tolerance=0.6)
-                
-                if not any(matches):  # Unknown face detected
-                    face_key = f"unknown_{i}"
-                    if face_key not in self.unknown_face_cooldown or current_time - self.unknown_face_cooldown[face_key] > 60:
-                        self.unknown_face_cooldown[face_key] = current_time
-                        face_img = frame[top:bottom, left:right]
+            for face in result.faces:
+                track_id = face["track_id"]
+                if face["distance"] is None:  # Unknown face detected
+                    if track_id not in stream.unknown_face_cooldown or current_time - stream.unknown_face_cooldown[track_id] > 60:
+                        stream.unknown_face_cooldown[track_id] = current_time
+                        top, right, bottom, left = face["box"]
+                        # The frame is a reusable ring slot, so keep a copy of the crop
+                        face_img = frame[top:bottom, left:right].copy()
                         threading.Thread(target=self.auto_register_unknown_face, args=(face_img,), daemon=True).start()
-                else:
-                    # Known face - greet if not greeted recently
-                    first_match_index = matches.index(True)
-                    name = self.vision.known_face_names[first_match_index]
-                    if name not in self.last_detection_time or current_time - self.last_detection_time[name] > 30:
+                elif stream.greeted_tracks.get(track_id) != face["name"]:
+                    # Newly identified track - greet unless this person was just greeted on another track
+                    name = face["name"]
+                    stream.greeted_tracks[track_id] = name
+                    if name not in stream.last_detection_time or current_time - stream.last_detection_time[name] > 30:
                         self.add_message("System", f"👋 Hello {name}! Welcome back!")
                         self.speech.speak(f"Hello {name}! Welcome back!")
-                        self.last_detection_time[name] = current_time
+                        stream.last_detection_time[name] = current_time
+            
+            # Forget state for tracks the tracker has dropped
+            active = stream.tracker.active_ids()
+            for track_id in list(stream.greeted_tracks):
+                if track_id not in active:
+                    del stream.greeted_tracks[track_id]
+            for track_id in list(stream.unknown_face_cooldown):
+                if track_id not in active and current_time - stream.unknown_face_cooldown[track_id] > 60:
+                    del stream.unknown_face_cooldown[track_id]
                         
         except Exception as e:
             pass  # Silently handle any face detection errors
@@ -145,13 +252,11 @@ class FullAIVisionAssistant:
                         success = self.vision.register_face(face_img, name.strip())
                         if success:
                             face_hash = self.vision.generate_face_hash(face_img)
-                            tx_hash = self.blockchain.register_user_on_blockchain(face_hash)
-                            if tx_hash:
-                                self.add_message("System", f"🔗 Blockchain registration: {tx_hash}")
+                            self.register_face_on_chain(face_hash)
                             self.add_message("System", f"✅ Successfully registered {name}!")
                             self.speech.speak(f"Hello {name}! Nice to meet you. I've registered your face.")
             
-            self.root.after(0, register_dialog)
+            self.gui.call_on_main(register_dialog)
         except Exception as e:
             self.add_message("System", f"❌ Auto-registration error: {str(e)}")
     
@@ -162,24 +267,36 @@ class FullAIVisionAssistant:
             
         name = simpledialog.askstring("Register Face", "Enter the person's name:")
         if name and name.strip():
-            ret, frame = self.cap.read()
-            if ret:
+            frame = self.current_frame()
+            if frame is not None:
                 success = self.vision.register_face(frame, name.strip())
                 if success:
                     face_hash = self.vision.generate_face_hash(frame)
-                    tx_hash = self.blockchain.register_user_on_blockchain(face_hash)
-                    if tx_hash:
-                        self.add_message("System", f"🔗 Blockchain registration: {tx_hash}")
+                    self.register_face_on_chain(face_hash)
                     self.add_message("System", f"✅ Successfully registered {name}!")
                     self.speech.speak(f"Hello {name}! Nice to meet you. I've registered your face.")
     
+    def register_face_on_chain(self, face_hash):
+        """Send registerUser unless this wallet is registered already.
+        
+        The contract allows one face hash per address and face hashes
+        differ per capture, so the check is by account, not by hash.
+        """
+        registered = self.chain_state and self.chain_state["registered"]
+        if registered or self.blockchain.get_registered_face_hash():
+            self.add_message("System", "🔗 This wallet is already registered on-chain; skipping the transaction")
+            return
+        tx_hash = self.blockchain.register_user_on_blockchain(face_hash)
+        if tx_hash:
+            self.add_message("System", f"🔗 Blockchain registration: {tx_hash}")
+    
     def sketch_detected_face(self):
         if not self.video_running:
             self.add_message("System", "❌ Please start the camera first!")
             return
             
-        ret, frame = self.cap.read()
-        if not ret:
+        frame = self.current_frame()
+        if frame is None:
             self.add_message("System", "❌ Failed to capture frame!")
             return
             
@@ -265,67 +382,26 @@ class FullAIVisionAssistant:
                                        f"Make sure your VRF subscription is funded with LINK!")
             
             if result:
-                self.add_message("System", "🔗 Starting Chainlink VRF NFT minting...")
-                self.gui.vrf_status_label.config(text="VRF Status: Minting...")
-                threading.Thread(target=self._mint_nft_process, args=(sketch, filename), daemon=True).start()
+                job_id = self.mint_queue.submit(sketch)
+                self.add_message("System", f"🔗 Queued Chainlink VRF NFT mint job {job_id}")
                 
         except Exception as e:
             self.add_message("System", f"❌ NFT minting failed: {str(e)}")
     
-    def _mint_nft_process(self, sketch, filename):
-        """Background NFT minting process"""
-        try:
-            # Upload to IPFS
-            self.add_message("System", "📁 Uploading sketch to IPFS...")
-            ipfs_hash = self.ipfs.upload_image_to_ipfs(sketch)
-            
-            if not ipfs_hash:
-                self.gui.vrf_status_label.config(text="VRF Status: Failed")
-                return
-            
-            # Create metadata
-            self.add_message("System", "📝 Creating NFT metadata...")
-            metadata = {
-                "name": f"AI Vision Sketch #{int(time.time())}",
-                "description": "AI-generated sketch with Chainlink VRF randomness",
-                "image": f"ipfs://{ipfs_hash}",
-                "attributes": [
-                    {"trait_type": "Creation Method", "value": "AI Sketch Generation"},
-                    {"trait_type": "Timestamp", "value": datetime.now().isoformat()},
-                    {"trait_type": "Randomness Source", "value": "Chainlink VRF"},
-                    {"trait_type": "Network", "value": "Ethereum Sepolia"}
-                ]
-            }
-            
-            metadata_hash = self.ipfs.upload_metadata_to_ipfs(metadata)
-            if not metadata_hash:
-                self.gui.vrf_status_label.config(text="VRF Status: Failed")
-                return
-            
-            # Mint NFT
-            self.add_message("System", "⛏️ Requesting Chainlink VRF for NFT minting...")
-            metadata_uri = f"ipfs://{metadata_hash}"
-            tx_hash = self.blockchain.request_nft_mint(metadata_uri)
-            
-            if tx_hash:
-                self.add_message("System", f"✅ VRF NFT request sent! TX: {tx_hash}")
-                self.add_message("System", f"🔍 View on Etherscan: https://sepolia.etherscan.io/tx/{tx_hash}")
-                self.gui.vrf_status_label.config(text="VRF Status: Pending...")
-                
-                # Monitor fulfillment
-                success, message = self.blockchain.monitor_vrf_fulfillment(tx_hash)
-                if success:
-                    self.gui.vrf_status_label.config(text="VRF Status: Complete")
-                    messagebox.showinfo("Success", f"NFT minted successfully!\n{message}")
-                else:
-                    self.gui.vrf_status_label.config(text="VRF Status: Failed")
-                    self.add_message("System", f"❌ {message}")
-            else:
-                self.gui.vrf_status_label.config(text="VRF Status: Failed")
-                
-        except Exception as e:
-            self.add_message("System", f"❌ NFT minting failed: {str(e)}")
-            self.gui.vrf_status_label.config(text="VRF Status: Error")
+    def show_mint_progress(self, job):
+        """Called from mint workers whenever a job changes stage"""
+        text = f"#{job['id']} {job['name']}: {STAGE_LABELS[job['stage']]}"
+        if job["stage"] == "fulfilled":
+            text += f" (token {job['token_id']})"
+        elif job["stage"] == "failed":
+            text += f" - {job['error'][:60]}"
+        elif job["error"]:
+            text += f" (retry {job['attempts']}: {job['error'][:60]})"
+        self.gui.set_mint_job(job["id"], text)
+        active = len(self.mint_queue.jobs(include_finished=False))
+        self.gui.set_vrf_status(f"VRF Status: {active} mint(s) in progress" if active else "VRF Status: Ready")
+        if job["stage"] == "fulfilled":
+            self.gui.call_on_main(messagebox.showinfo, "Success", f"NFT minted successfully!\nToken ID: {job['token_id']}")
     
     def send_message(self, event=None):
         message = self.gui.user_input.get().strip()
@@ -343,9 +419,25 @@ class FullAIVisionAssistant:
     def get_vision_context(self):
         context = []
         if self.video_running:
-            context.append("Camera is active")
+            live = [stream.name for stream in self.streams if stream.pipeline]
+            context.append(f"Camera is active ({', '.join(live)}; showing {self.active_stream.name})")
             if self.vision.known_face_names:
                 context.append(f"Known faces: {', '.join(self.vision.known_face_names)}")
+        # Last dashboard read; the chat never waits on the RPC
+        state = self.chain_state
+        if state:
+            registered = "registered" if state["registered"] else "not registered"
+            context.append(
+                f"Wallet is {registered} on-chain; ETH/USD ${state['eth_usd']:,.2f}, "
+                f"BTC/USD ${state['btc_usd']:,.2f}; {state['token_counter']} NFTs minted"
+            )
+        minted = self.blockchain.get_minted_tokens()
+        if minted:
+            tokens = ", ".join(f"#{mint['token_id']}" for mint in minted[-10:])
+            context.append(f"This wallet owns {len(minted)} AI Vision NFTs (latest: {tokens})")
+        history = self.blockchain.get_history_summary()
+        if history:
+            context.append(f"On-chain history: {history}")
         return "; ".join(context)
     
     def get_chat_response(self, message, context):
@@ -406,30 +498,37 @@ class FullAIVisionAssistant:
                 filename, content = self.art.generate_ai_art(prompt)
                 if content:
                     # Display in new window
-                    self.art.display_ai_art_window(content, filename)
+                    self.gui.call_on_main(self.art.display_ai_art_window, content, filename)
                     
                     # Update preview in main GUI
                     from PIL import Image
                     image = Image.open(io.BytesIO(content))
                     image = image.resize((200, 200))
                     from PIL import ImageTk
-                    self.art_image = ImageTk.PhotoImage(image)
-                    self.gui.art_label.config(image=self.art_image)
-                    self.gui.art_label.image = self.art_image
+                    
+                    def show_preview():
+                        self.art_image = ImageTk.PhotoImage(image)
+                        self.gui.art_label.config(image=self.art_image)
+                        self.gui.art_label.image = self.art_image
+                    
+                    self.gui.call_on_main(show_preview)
             
         threading.Thread(target=create_art, daemon=True).start()
 
     
-    def update_crypto_prices(self):
-        """Update crypto prices every 30 seconds"""
-        try:
-            eth_price, btc_price = self.blockchain.get_crypto_prices()
-            self.gui.update_crypto_prices(eth_price, btc_price)
-        except Exception as e:
-            pass
+    def update_dashboard(self):
+        """Update prices, registration and token counter every 30 seconds"""
+        def fetch():
+            # RPC calls stay off the Tk thread; the whole panel is one batched read
+            state = self.blockchain.get_dashboard_state()
+            if state:
+                self.chain_state = state
+                self.gui.call_on_main(self.gui.update_dashboard, state)
+        
+        threading.Thread(target=fetch, daemon=True).start()
         
         # Schedule next update
-        self.root.after(30000, self.update_crypto_prices)
+        self.root.after(30000, self.update_dashboard)
     
     def run(self):
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -437,8 +536,12 @@ class FullAIVisionAssistant:
     
     def on_closing(self):
         self.video_running = False
-        if self.cap:
-            self.cap.release()
+        for stream in self.streams:
+            self.close_stream(stream)
+        self.vision.shutdown()
+        self.metrics_exporter.stop()
+        self.mint_queue.stop()
+        self.blockchain.shutdown()
         cv2.destroyAllWindows()
         self.root.destroy()
 
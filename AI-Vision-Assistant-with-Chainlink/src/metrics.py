@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from constants import METRICS_WINDOW, METRICS_FPS_WINDOW
+
+class LatencyHistogram:
+    """Rolling window of the last N samples of one stage, in seconds"""
+    def __init__(self, window=METRICS_WINDOW):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+    
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+    
+    def summary(self):
+        filled = self.samples[:min(self.count, len(self.samples))] * 1000.0
+        if not len(filled):
+            return {"count": self.count}
+        p50, p95, p99 = np.percentile(filled, (50, 95, 99))
+        return {
+            "count": self.count,
+            "mean_ms": round(float(filled.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(filled.max()), 3),
+        }
+
+class RateMeter:
+    """Events per second over the last few seconds"""
+    def __init__(self, window=METRICS_FPS_WINDOW):
+        self.window = window
+        self.events = deque()
+    
+    def tick(self, now):
+        self.events.append(now)
+        while self.events and now - self.events[0] > self.window:
+            self.events.popleft()
+    
+    def rate(self, now):
+        while self.events and now - self.events[0] > self.window:
+            self.events.popleft()
+        if len(self.events) < 2:
+            return 0.0
+        return (len(self.events) - 1) / max(self.events[-1] - self.events[0], 1e-6)
+
+class Metrics:
+    """Thread-safe per-stage latency, frame-rate and counter registry.
+    
+    Stages are timed with record()/timer(), rates are fed with tick() and
+    plain counts (dropped frames, errors) with increment(). snapshot()
+    returns everything as a JSON-friendly dict; status_text() is the
+    one-line summary shown in the GUI status bar.
+    """
+    STATUS_STAGES = ("face_detect", "encode", "yolo", "render")
+    
+    def __init__(self, window=METRICS_WINDOW, fps_window=METRICS_FPS_WINDOW):
+        self.window = window
+        self.fps_window = fps_window
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.rates = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started_at = time.time()
+    
+    def record(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram(self.window)
+            histogram.add(seconds)
+    
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+    
+    def tick(self, name):
+        now = time.perf_counter()
+        with self.lock:
+            meter = self.rates.get(name)
+            if meter is None:
+                meter = self.rates[name] = RateMeter(self.fps_window)
+            meter.tick(now)
+    
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def set_gauge(self, name, value):
+        """Absolute values owned elsewhere, e.g. the frame ring's dropped count"""
+        with self.lock:
+            self.gauges[name] = value
+    
+    def fps(self, name):
+        with self.lock:
+            meter = self.rates.get(name)
+            return meter.rate(time.perf_counter()) if meter else 0.0
+    
+    def snapshot(self):
+        now = time.perf_counter()
+        with self.lock:
+            return {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "stages": {name: h.summary() for name, h in self.stages.items()},
+                "fps": {name: round(m.rate(now), 2) for name, m in self.rates.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+    
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+    
+    def to_text(self):
+        """Plain-text dump, one line per stage"""
+        snapshot = self.snapshot()
+        lines = [f"uptime {snapshot['uptime_s']}s"]
+        for name, fps in snapshot["fps"].items():
+            lines.append(f"fps {name} {fps:.2f}")
+        for name, value in {**snapshot["counters"], **snapshot["gauges"]}.items():
+            lines.append(f"count {name} {value}")
+        for name, stats in snapshot["stages"].items():
+            if "p50_ms" in stats:
+                lines.append(
+                    f"stage {name} n={stats['count']} p50={stats['p50_ms']:.2f}ms "
+                    f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms"
+                )
+        return "\n".join(lines) + "\n"
+    
+    def status_text(self):
+        snapshot = self.snapshot()
+        fps = snapshot["fps"]
+        parts = [
+            f"FPS cap {fps.get('capture', 0):.0f} / proc {fps.get('processed', 0):.0f} / disp {fps.get('display', 0):.0f}"
+        ]
+        for name in self.STATUS_STAGES:
+            stats = snapshot["stages"].get(name)
+            if stats and "p95_ms" in stats:
+                parts.append(f"{name} {stats['p50_ms']:.0f}/{stats['p95_ms']:.0f}ms")
+        # Pipelines publish "dropped" or one "dropped.<stream_id>" gauge per stream
+        dropped = sum(value for name, value in snapshot["gauges"].items()
+                      if name == "dropped" or name.startswith("dropped."))
+        dropped += snapshot["counters"].get("dropped", 0)
+        parts.append(f"dropped {dropped}")
+        return " | ".join(parts)
+
+class MetricsExporter:
+    """Serves metrics on a local HTTP port and/or rewrites a JSON file periodically.
+    
+    GET /metrics returns the text dump, /metrics.json the JSON snapshot.
+    The server binds to localhost only.
+    """
+    def __init__(self, metrics, port=None, path=None, interval=5.0, message_callback=None):
+        self.metrics = metrics
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.message_callback = message_callback or print
+        self.server = None
+        self.stop_event = threading.Event()
+        self.threads = []
+    
+    def start(self):
+        if self.port:
+            try:
+                self.server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+                self.server.daemon_threads = True
+                thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+                self.message_callback(f"📈 Metrics at http://127.0.0.1:{self.port}/metrics")
+            except Exception as e:
+                self.message_callback(f"⚠️ Metrics server unavailable: {str(e)}")
+                self.server = None
+        if self.path:
+            thread = threading.Thread(target=self._file_loop, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    
+    def _handler(self):
+        metrics = self.metrics
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = metrics.to_json(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = metrics.to_text(), "text/plain; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+    
+    def write_file(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.metrics.to_json())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.message_callback(f"⚠️ Failed to write metrics file: {str(e)}")
+    
+    def _file_loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.write_file()
+    
+    def stop(self):
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.path:
+            self.write_file()
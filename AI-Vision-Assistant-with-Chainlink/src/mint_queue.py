@@ -0,0 +1,244 @@
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from cid import compute_cid
+from blockchain import TransactionReverted
+from constants import (
+    MINT_QUEUE_DB, MINT_WORKERS, MINT_MAX_ATTEMPTS, MINT_RETRY_SECONDS, IPFS_CID_VERSION
+)
+
+STAGES = ("encoded", "image_pinned", "metadata_pinned", "tx_sent", "fulfilled")
+FAILED = "failed"
+STAGE_LABELS = {
+    "encoded": "Queued",
+    "image_pinned": "Image pinned",
+    "metadata_pinned": "Metadata pinned",
+    "tx_sent": "Waiting for VRF",
+    "fulfilled": "Minted",
+    FAILED: "Failed",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mint_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created TEXT NOT NULL,
+    image BLOB NOT NULL,
+    image_cid TEXT NOT NULL,
+    metadata_cid TEXT,
+    sending INTEGER NOT NULL DEFAULT 0,
+    tx_hash TEXT,
+    request_id TEXT,
+    token_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+def nft_metadata(name, created, image_cid):
+    return {
+        "name": name,
+        "description": "AI-generated sketch with Chainlink VRF randomness",
+        "image": f"ipfs://{image_cid}",
+        "attributes": [
+            {"trait_type": "Creation Method", "value": "AI Sketch Generation"},
+            {"trait_type": "Timestamp", "value": created},
+            {"trait_type": "Randomness Source", "value": "Chainlink VRF"},
+            {"trait_type": "Network", "value": "Ethereum Sepolia"}
+        ]
+    }
+
+class MintQueue:
+    """Persistent NFT mint jobs advanced by a bounded worker pool.
+    
+    Each job moves through STAGES and every transition is written to
+    SQLite before the next step starts, so after a crash resume() picks
+    each unfinished job up at its last completed stage. Steps are safe to
+    repeat: the PNG and metadata are fixed when the job is created and
+    re-pins are skipped by the IPFS pin cache. The mint transaction is the
+    one exception; a job that crashed while sending it is failed rather
+    than sent twice. Once the transaction is mined the worker is released
+    and the shared VRF watcher completes the job.
+    
+    Each stage gets MINT_MAX_ATTEMPTS tries. After the transaction is sent
+    only a revert fails the job: an unreachable RPC or a VRF request that
+    is slow to fulfil keeps being retried at the longest backoff.
+    
+    A job is owned by at most one worker, timer or VRF watch at a time;
+    scheduling a job that is already in flight (e.g. submit() racing
+    resume() at startup) does nothing.
+    
+    progress_callback(job) receives the job row as a dict after every change.
+    """
+    def __init__(self, ipfs, blockchain, db_path=MINT_QUEUE_DB, workers=MINT_WORKERS,
+                 progress_callback=None, message_callback=None):
+        self.ipfs = ipfs
+        self.blockchain = blockchain
+        self.progress_callback = progress_callback or (lambda job: None)
+        self.message_callback = message_callback or print
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.metadata_futures = {}
+        self.in_flight = set()
+        self.stopped = False
+    
+    def _job(self, job_id):
+        with self.lock:
+            row = self.db.execute("SELECT * FROM mint_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock, self.db:
+            self.db.execute(f"UPDATE mint_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        job = self._job(job_id)
+        self.progress_callback(job)
+        return job
+    
+    def jobs(self, include_finished=True):
+        sql = "SELECT * FROM mint_jobs"
+        if not include_finished:
+            sql += f" WHERE stage NOT IN ('fulfilled', '{FAILED}')"
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql + " ORDER BY id")]
+    
+    def submit(self, image, name=None):
+        """Persist a sketch as a new job and start it; returns the job id"""
+        _, buffer = cv2.imencode('.png', image)
+        png = buffer.tobytes()
+        name = name or f"AI Vision Sketch #{int(time.time())}"
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "INSERT INTO mint_jobs (stage, name, created, image, image_cid, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                ("encoded", name, datetime.now().isoformat(), png, compute_cid(png, IPFS_CID_VERSION), time.time())
+            )
+            job_id = cursor.lastrowid
+        self.progress_callback(self._job(job_id))
+        self._schedule(job_id)
+        return job_id
+    
+    def resume(self):
+        """Restart every unfinished job from its last completed stage"""
+        pending = self.jobs(include_finished=False)
+        for job in pending:
+            self.progress_callback(job)
+            self._schedule(job["id"])
+        if pending:
+            self.message_callback(f"🔁 Resuming {len(pending)} unfinished mint jobs")
+        return len(pending)
+    
+    def _schedule(self, job_id):
+        """Start a job unless it is already running, waiting on a retry timer or watching VRF"""
+        with self.lock:
+            if self.stopped or job_id in self.in_flight:
+                return
+            self.in_flight.add(job_id)
+        self._dispatch(job_id)
+    
+    def _dispatch(self, job_id, delay=0):
+        """Run a job this queue already owns, now or after delay seconds"""
+        if self.stopped:
+            return
+        if delay:
+            timer = threading.Timer(delay, self._dispatch, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.executor.submit(self._run, job_id)
+    
+    def _release(self, job_id):
+        with self.lock:
+            self.in_flight.discard(job_id)
+    
+    def _run(self, job_id):
+        job = self._job(job_id)
+        try:
+            self._advance(job)
+        except Exception as e:
+            self._retry(job_id, e)
+    
+    def _retry(self, job_id, error):
+        job = self._job(job_id)
+        attempts = job["attempts"] + 1
+        on_chain = job["tx_hash"] is not None
+        if isinstance(error, TransactionReverted) or (attempts >= MINT_MAX_ATTEMPTS and not on_chain):
+            self._update(job_id, stage=FAILED, attempts=attempts, error=str(error))
+            self.message_callback(f"❌ Mint job {job_id} failed: {str(error)}")
+            self._release(job_id)
+            return
+        self._update(job_id, attempts=attempts, error=str(error))
+        self._dispatch(job_id, MINT_RETRY_SECONDS * 2 ** (min(attempts, MINT_MAX_ATTEMPTS) - 1))
+    
+    def _advance(self, job):
+        job_id = job["id"]
+        
+        if job["stage"] == "encoded":
+            # Metadata can reference the locally computed CID, so both pins run at once
+            metadata = json.dumps(nft_metadata(job["name"], job["created"], job["image_cid"])).encode()
+            self.metadata_futures[job_id] = self.ipfs.submit_pin(metadata, "metadata.json", "application/json")
+            image_hash = self.ipfs.pin_bytes(job["image"], "sketch.png", "image/png")
+            job = self._update(job_id, stage="image_pinned", image_cid=image_hash, attempts=0, error=None)
+        
+        if job["stage"] == "image_pinned":
+            future = self.metadata_futures.pop(job_id, None)
+            metadata = json.dumps(nft_metadata(job["name"], job["created"], job["image_cid"])).encode()
+            metadata_hash = self._pin_metadata(future, metadata)
+            job = self._update(job_id, stage="metadata_pinned", metadata_cid=metadata_hash, attempts=0, error=None)
+        
+        if job["stage"] == "metadata_pinned":
+            if job["sending"]:
+                # Crashed mid-send: the transaction may be on chain already
+                self._update(job_id, stage=FAILED,
+                             error="Interrupted while sending the mint transaction; check the account before retrying")
+                self._release(job_id)
+                return
+            self._update(job_id, sending=1)
+            tx_hash = self.blockchain.request_nft_mint(f"ipfs://{job['metadata_cid']}")
+            if not tx_hash:
+                self._update(job_id, sending=0)
+                raise RuntimeError("Mint transaction was not sent")
+            job = self._update(job_id, stage="tx_sent", tx_hash=tx_hash, sending=0, attempts=0, error=None)
+            self.message_callback(f"✅ Mint job {job_id} sent: https://sepolia.etherscan.io/tx/{tx_hash}")
+        
+        if job["stage"] == "tx_sent":
+            request_id = job["request_id"]
+            if request_id is None:
+                request_id = str(self.blockchain.get_vrf_request_id(job["tx_hash"]))
+                self._update(job_id, request_id=request_id)
+            # The worker is free from here; the shared VRF watcher finishes the job
+            future = self.blockchain.watch_vrf_request(int(request_id))
+            future.add_done_callback(lambda f: self._fulfilled(job_id, f))
+    
+    def _pin_metadata(self, future, metadata):
+        """Result of the concurrent pin if it used the final image CID, else a fresh pin"""
+        if future is not None:
+            pinned = future.result()
+            if pinned == compute_cid(metadata, IPFS_CID_VERSION):
+                return pinned
+        return self.ipfs.pin_bytes(metadata, "metadata.json", "application/json")
+    
+    def _fulfilled(self, job_id, future):
+        try:
+            token_id = future.result()
+        except Exception as e:
+            self._retry(job_id, e)
+            return
+        self._update(job_id, stage="fulfilled", token_id=token_id, error=None)
+        self._release(job_id)
+        self.message_callback(f"🎉 Mint job {job_id} complete: token #{token_id}")
+    
+    def stop(self):
+        """Stop taking work; unfinished jobs resume on the next start"""
+        self.stopped = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,211 @@
+import threading
+import time
+import numpy as np
+from frame_ring import FrameRing
+from metrics import Metrics
+
+class VideoPipeline:
+    """Capture -> inference -> display pipeline over a shared-memory FrameRing.
+    
+    The capture thread decodes camera frames straight into ring slots and
+    inference workers always take the newest ready slot, so stale frames
+    are dropped instead of queueing up behind slow inference. Workers
+    annotate the slot in place and the GUI renders it by index on its own
+    cadence via acquire_display()/release_display(); no frame is copied
+    between stages.
+    
+    stop() does not wait for a slow inference pass: the ring is closed by
+    whichever of stop() and the pipeline threads finishes last, so no
+    thread ever touches a closed ring.
+    """
+    def __init__(self, cap, process_fn, result_callback=None, annotate_fn=None,
+                 workers=1, message_callback=None, metrics=None, stream_id=None):
+        self.cap = cap
+        self.process_fn = process_fn
+        self.result_callback = result_callback
+        self.annotate_fn = annotate_fn
+        self.workers = max(1, workers)
+        self.message_callback = message_callback or print
+        self.metrics = metrics or Metrics()
+        # Several streams share one registry; each reports its own drop count
+        self.dropped_gauge = "dropped" if stream_id is None else f"dropped.{stream_id}"
+        
+        self.running = False
+        self.threads = []
+        self.live_threads = 0
+        self.closing = False
+        self.ring = None
+        self.frame_ready = threading.Condition()
+        self.lock = threading.Lock()
+        self.latest = None
+        self.frame_id = 0
+        self.counters = {"captured": 0, "processed": 0}
+        self.started_at = None
+        self.snapshot_requested = threading.Event()
+        self.snapshot_done = threading.Event()
+        self.snapshot = None
+    
+    def start(self):
+        self.running = True
+        self.closing = False
+        self.started_at = time.time()
+        loops = [self._capture_loop] + [self._inference_loop] * self.workers
+        self.threads = [threading.Thread(target=self._run_thread, args=(loop,), daemon=True) for loop in loops]
+        self.live_threads = len(self.threads)
+        for thread in self.threads:
+            thread.start()
+    
+    def stop(self, timeout=1.0):
+        self.running = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.threads = []
+        with self.lock:
+            self.closing = True
+            last = self.live_threads == 0
+        # Otherwise a worker is still mid-inference and closes the ring on its way out
+        if last:
+            self._close_ring()
+    
+    def _run_thread(self, loop):
+        try:
+            loop()
+        finally:
+            with self.lock:
+                self.live_threads -= 1
+                last = self.live_threads == 0 and self.closing
+            if last:
+                self._close_ring()
+    
+    def _close_ring(self):
+        ring, self.ring = self.ring, None
+        if ring:
+            ring.close()
+    
+    def _create_ring(self, frame):
+        # One slot being written, one per worker, one ready, one done and one on screen
+        self.ring = FrameRing(self.workers + 4, frame.shape)
+    
+    def _capture_loop(self):
+        ret, first = self.cap.read()
+        if ret:
+            self._create_ring(first)
+        
+        while ret and self.running and self.cap.isOpened():
+            index = self.ring.acquire_write()
+            if index is None:
+                # Every slot is being analysed or shown; let a worker finish
+                time.sleep(0.001)
+                continue
+            
+            slot = self.ring.frame(index)
+            if first is not None:
+                slot[...] = first
+                first = None
+            else:
+                # Decode directly into the shared slot
+                read_started = time.perf_counter()
+                ret, frame = self.cap.read(slot)
+                self.metrics.record("capture", time.perf_counter() - read_started)
+                if not ret:
+                    self.ring.abandon(index)
+                    self.message_callback("⚠️ Camera stream ended")
+                    break
+                if not np.shares_memory(frame, slot):
+                    slot[...] = frame
+            
+            if self.snapshot_requested.is_set():
+                self.snapshot = slot.copy()
+                self.snapshot_requested.clear()
+                self.snapshot_done.set()
+            
+            self.frame_id += 1
+            self.ring.publish(index, self.frame_id, time.time())
+            with self.lock:
+                self.counters["captured"] += 1
+            self.metrics.tick("capture")
+            self.metrics.set_gauge(self.dropped_gauge, self.ring.dropped)
+            with self.frame_ready:
+                self.frame_ready.notify()
+        
+        self.running = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+    
+    def _inference_loop(self):
+        while self.running:
+            ring = self.ring
+            index = ring.acquire_latest() if ring else None
+            if index is None:
+                with self.frame_ready:
+                    self.frame_ready.wait(0.1)
+                continue
+            
+            frame = ring.frame(index)
+            frame_id = int(ring.meta["frame_id"][index])
+            captured_at = float(ring.meta["timestamp"][index])
+            try:
+                result = self.process_fn(frame)
+                # Callbacks see the clean frame; annotation then draws into the slot itself
+                if self.result_callback:
+                    self.result_callback(frame, result)
+                if self.annotate_fn:
+                    result.display_frame = self.annotate_fn(frame, result)
+            except Exception as e:
+                ring.release(index)
+                self.metrics.increment("errors")
+                self.message_callback(f"❌ Processing error: {str(e)}")
+                continue
+            
+            with self.lock:
+                self.counters["processed"] += 1
+                if not self.latest or frame_id > self.latest[0]:
+                    self.latest = (frame_id, captured_at, result)
+            ring.mark_done(index)
+            self.metrics.tick("processed")
+            # Capture-to-annotated latency, including time spent waiting in the ring
+            self.metrics.record("frame_latency", time.time() - captured_at)
+            self.metrics.set_gauge(self.dropped_gauge, ring.dropped)
+    
+    def acquire_display(self, after_frame_id=-1):
+        """Newest annotated (index, frame_id, frame) not yet shown, or None.
+        
+        The slot is held until release_display(index) is called.
+        """
+        ring = self.ring
+        index = ring.acquire_display(after_frame_id) if ring else None
+        # The last pipeline thread may close the ring while stopping
+        meta, frames = (ring.meta, ring.frames) if index is not None else (None, None)
+        if meta is None or frames is None:
+            return None
+        return index, int(meta["frame_id"][index]), frames[index]
+    
+    def release_display(self, index):
+        ring = self.ring
+        if ring:
+            ring.release(index)
+    
+    def latest_result(self):
+        """Newest (frame_id, captured_at, result) tuple, or None"""
+        return self.latest
+    
+    def capture_snapshot(self, timeout=1.0):
+        """Clean copy of the next captured frame, for dialogs that outlive a slot"""
+        self.snapshot_done.clear()
+        self.snapshot_requested.set()
+        if not self.snapshot_done.wait(timeout):
+            self.snapshot_requested.clear()
+            return None
+        return self.snapshot
+    
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats["dropped"] = self.ring.dropped if self.ring else 0
+        elapsed = max(time.time() - (self.started_at or time.time()), 1e-6)
+        stats["capture_fps"] = stats["captured"] / elapsed
+        stats["processed_fps"] = stats["processed"] / elapsed
+        return stats
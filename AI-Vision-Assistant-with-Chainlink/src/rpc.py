@@ -0,0 +1,99 @@
+import itertools
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from constants import RPC_TIMEOUT, RPC_POOL_SIZE
+
+class RpcError(Exception):
+    def __init__(self, error):
+        self.code = error.get("code") if isinstance(error, dict) else None
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        super().__init__(f"RPC error {self.code}: {message}")
+
+def pooled_session(pool_size=RPC_POOL_SIZE):
+    """requests.Session with keep-alive connections shared by every RPC caller"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class RpcBatchClient:
+    """JSON-RPC client that sends many calls in one HTTP request.
+    
+    Any JSON-RPC endpoint works, including a local dev node (anvil,
+    hardhat) used as a stand-in for Sepolia. batch() returns results
+    in call order; a failed entry comes back as an RpcError instance
+    rather than failing the whole batch.
+    """
+    def __init__(self, url, session=None, timeout=RPC_TIMEOUT):
+        self.url = url
+        self.session = session or pooled_session()
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+    
+    def _next_id(self):
+        with self.lock:
+            return next(self.ids)
+    
+    def request(self, method, params=()):
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, RpcError):
+            raise result
+        return result
+    
+    def batch(self, calls):
+        """calls: [(method, params)] -> [result or RpcError], one HTTP round trip"""
+        if not calls:
+            return []
+        payload = []
+        for method, params in calls:
+            payload.append({"jsonrpc": "2.0", "id": self._next_id(), "method": method, "params": list(params)})
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        if isinstance(body, dict):
+            # Some nodes answer a batch with a single error object
+            raise RpcError(body.get("error", body))
+        
+        # Responses may come back in any order
+        by_id = {item.get("id"): item for item in body}
+        results = []
+        for request in payload:
+            item = by_id.get(request["id"])
+            if item is None:
+                results.append(RpcError({"message": "missing response in batch"}))
+            elif "error" in item:
+                results.append(RpcError(item["error"]))
+            else:
+                results.append(item.get("result"))
+        return results
+
+class ContractReader:
+    """Batches view-function calls on web3 contracts into one eth_call batch"""
+    def __init__(self, w3, client):
+        self.w3 = w3
+        self.client = client
+    
+    def read(self, calls, block="latest"):
+        """calls: [(contract, function_name, args)] -> decoded outputs in order.
+        
+        Functions with a single output return the bare value, others a tuple.
+        Raises the first RpcError if any call failed.
+        """
+        payload = []
+        functions = []
+        for contract, name, args in calls:
+            function = contract.get_function_by_name(name)(*args)
+            functions.append(function)
+            payload.append(("eth_call", [{"to": contract.address, "data": function._encode_transaction_data()}, block]))
+        
+        results = []
+        for function, raw in zip(functions, self.client.batch(payload)):
+            if isinstance(raw, RpcError):
+                raise raw
+            types = [output["type"] for output in function.abi["outputs"]]
+            decoded = self.w3.codec.decode(types, bytes.fromhex(raw[2:] if raw.startswith("0x") else raw))
+            results.append(decoded[0] if len(decoded) == 1 else tuple(decoded))
+        return results
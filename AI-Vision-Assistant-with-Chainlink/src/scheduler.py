@@ -0,0 +1,85 @@
+import math
+import threading
+from constants import (
+    YOLO_SCHEDULE, YOLO_INTERVAL, YOLO_MIN_INTERVAL,
+    YOLO_MAX_INTERVAL, TARGET_FPS
+)
+
+class DetectionScheduler:
+    """Decides on which frames YOLO runs so the pipeline holds TARGET_FPS.
+    
+    Modes (YOLO_SCHEDULE):
+      "every_frame" - run on every frame (the original behaviour)
+      "interval"    - run every YOLO_INTERVAL frames
+      "adaptive"    - pick the interval N from measured costs so that
+                      per-frame work + YOLO/N fits the frame budget, and
+                      also run early whenever the current frame still has
+                      enough budget left for a YOLO pass
+    Frames that skip YOLO reuse the last detections (None before the first run).
+    """
+    def __init__(self, mode=YOLO_SCHEDULE, interval=YOLO_INTERVAL, min_interval=YOLO_MIN_INTERVAL,
+                 max_interval=YOLO_MAX_INTERVAL, target_fps=TARGET_FPS, smoothing=0.2):
+        self.mode = mode
+        self.fixed_interval = max(1, interval)
+        self.min_interval = max(1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.frame_budget = 1.0 / target_fps
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        
+        self.yolo_time = None
+        self.frame_time = None
+        self.frames_since_run = None
+        self.last_objects = None
+    
+    def _ewma(self, current, sample):
+        if current is None:
+            return sample
+        return (1 - self.smoothing) * current + self.smoothing * sample
+    
+    @property
+    def interval(self):
+        """Current number of frames between YOLO runs"""
+        if self.mode == "every_frame":
+            return 1
+        if self.mode == "interval" or self.yolo_time is None:
+            return self.fixed_interval
+        spare = self.frame_budget - (self.frame_time or 0.0)
+        if spare <= 0:
+            return self.max_interval
+        needed = math.ceil(self.yolo_time / spare)
+        return min(self.max_interval, max(self.min_interval, needed))
+    
+    def should_run(self, elapsed=0.0):
+        """elapsed: time already spent on the current frame before YOLO"""
+        with self.lock:
+            if self.frames_since_run is None:
+                return True
+            due = self.frames_since_run + 1 >= self.interval
+            if due or self.mode != "adaptive":
+                return due
+            # Opportunistic run when this frame has room to spare
+            return (self.frames_since_run + 1 >= self.min_interval
+                    and self.yolo_time is not None
+                    and elapsed + self.yolo_time <= self.frame_budget)
+    
+    def record_run(self, objects, seconds):
+        with self.lock:
+            self.yolo_time = self._ewma(self.yolo_time, seconds)
+            self.frames_since_run = 0
+            self.last_objects = objects
+    
+    def record_skip(self):
+        with self.lock:
+            if self.frames_since_run is not None:
+                self.frames_since_run += 1
+            return self.last_objects
+    
+    def record_frame(self, seconds):
+        """Per-frame cost excluding YOLO"""
+        with self.lock:
+            self.frame_time = self._ewma(self.frame_time, seconds)
+    
+    @property
+    def objects_age(self):
+        return self.frames_since_run or 0
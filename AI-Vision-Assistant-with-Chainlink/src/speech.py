@@ -1,14 +1,19 @@
-import pyttsx3
-import speech_recognition as sr
 import threading
 
 class SpeechProcessor:
-    def __init__(self, message_callback=None):
+    def __init__(self, message_callback=None, setup=True):
         self.message_callback = message_callback or print
-        self.setup_speech()
+        self.tts_engine = None
+        self.recognizer = None
+        self.microphone = None
+        if setup:
+            self.setup_speech()
     
     def setup_speech(self):
         try:
+            # Imported here so the audio stack only loads when speech is set up
+            import pyttsx3
+            import speech_recognition as sr
             self.tts_engine = pyttsx3.init()
             self.tts_engine.setProperty('rate', 150)
             self.recognizer = sr.Recognizer()
@@ -27,6 +32,7 @@ class SpeechProcessor:
         threading.Thread(target=tts, daemon=True).start()
     
     def listen(self):
+        import speech_recognition as sr
         try:
             self.message_callback("🎤 Listening...")
             with self.microphone as source:
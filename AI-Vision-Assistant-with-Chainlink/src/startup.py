@@ -0,0 +1,76 @@
+import time
+import threading
+from contextlib import contextmanager
+
+class StartupReport:
+    """Wall-clock cost of each startup component, measured from process start"""
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.lock = threading.Lock()
+        self.components = []
+        self.milestones = {}
+    
+    @contextmanager
+    def timed(self, component):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, time.perf_counter() - started)
+    
+    def record(self, component, seconds):
+        with self.lock:
+            self.components.append((component, seconds))
+    
+    def milestone(self, name):
+        """Time since process start at which something became available"""
+        with self.lock:
+            self.milestones[name] = time.perf_counter() - self.started
+    
+    def summary(self):
+        with self.lock:
+            components = list(self.components)
+            milestones = dict(self.milestones)
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in milestones.items()]
+        parts += [f"{name} {seconds * 1000:.0f}ms" for name, seconds in components]
+        return "⏱️ Startup: " + ", ".join(parts)
+
+class BackgroundWarmup:
+    """Runs slow initialisation tasks off the Tk thread and reports progress.
+    
+    Tasks run one after another in a daemon thread, each timed into the
+    StartupReport. progress_callback(done, total, name) is called before
+    each task and once more with name=None when everything has finished.
+    """
+    def __init__(self, report, progress_callback=None, message_callback=None):
+        self.report = report
+        self.progress_callback = progress_callback or (lambda done, total, name: None)
+        self.message_callback = message_callback or print
+        self.tasks = []
+        self.finished = {}
+        self.done = threading.Event()
+    
+    def add(self, name, func):
+        self.tasks.append((name, func))
+        self.finished[name] = threading.Event()
+    
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def _run(self):
+        total = len(self.tasks)
+        for done, (name, func) in enumerate(self.tasks):
+            self.progress_callback(done, total, name)
+            try:
+                with self.report.timed(name):
+                    func()
+            except Exception as e:
+                self.message_callback(f"❌ {name} failed to start: {str(e)}")
+            self.finished[name].set()
+        self.report.milestone("ready")
+        self.done.set()
+        self.progress_callback(total, total, None)
+    
+    def is_ready(self, name):
+        event = self.finished.get(name)
+        return event is None or event.is_set()
@@ -0,0 +1,78 @@
+import time
+import threading
+from tracker import FaceTracker
+from scheduler import DetectionScheduler
+
+def parse_camera_source(source):
+    """Device indices as ints, anything else (RTSP/HTTP URLs, files) as strings"""
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+class StreamContext:
+    """Everything that belongs to one camera rather than to the shared models.
+    
+    Each stream keeps its own face tracks, YOLO schedule, greetings and
+    registration cooldowns, so track IDs and "already greeted" state never
+    leak between cameras.
+    """
+    def __init__(self, stream_id, source, name=None):
+        self.id = stream_id
+        self.source = source
+        self.name = name or f"Camera {stream_id + 1}"
+        self.tracker = FaceTracker()
+        self.detection_scheduler = DetectionScheduler()
+        self.last_detection_time = {}
+        self.unknown_face_cooldown = {}
+        self.greeted_tracks = {}
+        self.cap = None
+        self.pipeline = None
+        self.displayed_frame_id = -1
+
+class FairInferenceScheduler:
+    """Shares the loaded models between streams with fair inference time.
+    
+    At most `slots` analyses run at once. When a slot frees up it goes to
+    the waiting stream that has used the least inference time so far, so
+    a busy camera cannot starve a quiet one. A stream that joins later
+    starts level with the least-served stream instead of at zero.
+    """
+    def __init__(self, slots):
+        self.condition = threading.Condition()
+        self.free = max(1, slots)
+        self.usage = {}
+        self.waiting = {}
+    
+    def register(self, stream_id):
+        with self.condition:
+            if stream_id not in self.usage:
+                self.usage[stream_id] = min(self.usage.values(), default=0.0)
+                self.waiting[stream_id] = 0
+    
+    def _next_stream(self):
+        waiting = [stream_id for stream_id, count in self.waiting.items() if count]
+        return min(waiting, key=self.usage.__getitem__) if waiting else None
+    
+    def run(self, stream_id, func, *args):
+        """Call func(*args) once this stream's turn comes up"""
+        self.register(stream_id)
+        with self.condition:
+            self.waiting[stream_id] += 1
+            while not (self.free and self._next_stream() == stream_id):
+                self.condition.wait()
+            self.waiting[stream_id] -= 1
+            self.free -= 1
+        
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            with self.condition:
+                self.usage[stream_id] += time.perf_counter() - started
+                self.free += 1
+                self.condition.notify_all()
+    
+    def shares(self):
+        """Fraction of inference time each stream has received"""
+        with self.condition:
+            total = sum(self.usage.values()) or 1.0
+            return {stream_id: used / total for stream_id, used in self.usage.items()}
@@ -0,0 +1,125 @@
+import itertools
+import threading
+import numpy as np
+from constants import (
+    TRACK_IOU_THRESHOLD, TRACK_MAX_MISSES,
+    TRACK_REVERIFY_INTERVAL, TRACK_UNCERTAIN_INTERVAL
+)
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between (top, right, bottom, left) boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+class FaceTrack:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.name = "Unknown"
+        self.distance = None
+        self.candidates = []
+        self.encoding = None
+        self.hits = 1
+        self.misses = 0
+        self.frames_since_encode = 0
+    
+    @property
+    def known(self):
+        return self.distance is not None
+    
+    def predicted_box(self):
+        return tuple(np.asarray(self.box, dtype=np.float32) + self.velocity)
+    
+    def update_box(self, box):
+        # Exponentially smoothed per-edge velocity, a cheap stand-in for a Kalman filter
+        delta = np.asarray(box, dtype=np.float32) - np.asarray(self.box, dtype=np.float32)
+        self.velocity = 0.5 * self.velocity + 0.5 * delta
+        self.box = box
+        self.hits += 1
+        self.misses = 0
+        self.frames_since_encode += 1
+    
+    def needs_encoding(self, reverify_interval, uncertain_interval):
+        if self.encoding is None:
+            return True
+        interval = reverify_interval if self.known else uncertain_interval
+        return self.frames_since_encode >= interval
+    
+    def set_identity(self, encoding, match):
+        self.encoding = encoding
+        self.name = match["name"]
+        self.distance = match["distance"]
+        self.candidates = match["candidates"]
+        self.frames_since_encode = 0
+
+class FaceTracker:
+    """Greedy IoU tracker giving each face a stable track ID across frames.
+    
+    Detection still runs every frame, but the expensive 128-d encoding is
+    only requested for new tracks and for periodic re-verification.
+    """
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_misses=TRACK_MAX_MISSES,
+                 reverify_interval=TRACK_REVERIFY_INTERVAL, uncertain_interval=TRACK_UNCERTAIN_INTERVAL):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.reverify_interval = reverify_interval
+        self.uncertain_interval = uncertain_interval
+        self.tracks = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+    
+    def update(self, boxes):
+        """Associate this frame's boxes with tracks.
+        
+        Returns (tracks, to_encode): the track for each box in order, and
+        the indices of boxes whose encoding must be (re)computed.
+        """
+        with self.lock:
+            existing = list(self.tracks.values())
+            assigned = [None] * len(boxes)
+            taken = set()
+            
+            if existing and boxes:
+                overlaps = iou_matrix([track.predicted_box() for track in existing], boxes)
+                # Greedy assignment, best overlap first
+                for flat in np.argsort(overlaps, axis=None)[::-1]:
+                    t, b = np.unravel_index(flat, overlaps.shape)
+                    if overlaps[t, b] < self.iou_threshold:
+                        break
+                    if t in taken or assigned[b] is not None:
+                        continue
+                    taken.add(t)
+                    assigned[b] = existing[t]
+                    existing[t].update_box(boxes[b])
+            
+            for t, track in enumerate(existing):
+                if t not in taken:
+                    track.misses += 1
+                    if track.misses > self.max_misses:
+                        del self.tracks[track.id]
+            
+            for i, box in enumerate(boxes):
+                if assigned[i] is None:
+                    track = FaceTrack(next(self._ids), box)
+                    self.tracks[track.id] = track
+                    assigned[i] = track
+            
+            to_encode = [
+                i for i, track in enumerate(assigned)
+                if track.needs_encoding(self.reverify_interval, self.uncertain_interval)
+            ]
+            return assigned, to_encode
+    
+    def active_ids(self):
+        with self.lock:
+            return set(self.tracks)
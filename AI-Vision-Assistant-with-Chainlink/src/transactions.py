@@ -0,0 +1,192 @@
+import time
+import threading
+from constants import (
+    TX_GAS_MARGIN, FEE_HISTORY_BLOCKS, FEE_PRIORITY_PERCENTILE, FEE_CACHE_SECONDS,
+    MIN_PRIORITY_FEE_GWEI, NONCE_RESYNC_SECONDS, STUCK_TX_SECONDS, TX_REPLACEMENT_BUMP
+)
+from rpc import RpcError
+
+class PendingTransaction:
+    def __init__(self, original_hash, tx, sent_at):
+        self.original_hash = original_hash
+        self.current_hash = original_hash
+        self.hashes = [original_hash]
+        self.tx = tx
+        self.sent_at = sent_at
+        self.replacements = 0
+
+class TransactionSender:
+    """Signs and sends contract transactions without per-tx nonce lookups.
+    
+    Nonces are tracked locally and resynced from the node periodically or
+    after a "nonce too low" rejection, so several transactions can be sent
+    back to back without waiting for receipts. Gas comes from estimate_gas
+    with a safety margin, and EIP-1559 fees from a cached fee_history. A
+    background check re-sends transactions still pending after
+    STUCK_TX_SECONDS with the same nonce and bumped fees.
+    """
+    def __init__(self, w3, account, private_key, rpc=None, message_callback=None):
+        self.w3 = w3
+        self.account = account
+        self.private_key = private_key
+        self.rpc = rpc
+        self.message_callback = message_callback or print
+        self.lock = threading.Lock()
+        self.nonce = None
+        self.nonce_synced_at = 0.0
+        self.fees = None
+        self.fees_at = 0.0
+        self.chain_id = w3.eth.chain_id
+        self.pending = {}
+        self.by_hash = {}
+        self.stop_event = threading.Event()
+        self.watcher = threading.Thread(target=self._watch_pending, daemon=True)
+        self.watcher.start()
+    
+    def _sync_nonce(self):
+        chain_nonce = self.w3.eth.get_transaction_count(self.account.address, "pending")
+        if self.nonce is None or not self.pending:
+            self.nonce = chain_nonce
+        else:
+            # Never step back over our own in-flight transactions
+            self.nonce = max(self.nonce, chain_nonce)
+        self.nonce_synced_at = time.time()
+    
+    def _fee_params(self):
+        """maxFeePerGas / maxPriorityFeePerGas from fee_history, cached for a few blocks"""
+        now = time.time()
+        if self.fees and now - self.fees_at < FEE_CACHE_SECONDS:
+            return self.fees
+        history = self.w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [FEE_PRIORITY_PERCENTILE])
+        rewards = sorted(reward[0] for reward in history["reward"] if reward)
+        priority = rewards[len(rewards) // 2] if rewards else 0
+        priority = max(priority, self.w3.to_wei(MIN_PRIORITY_FEE_GWEI, "gwei"))
+        # baseFeePerGas includes the next block; leave room for it to double
+        next_base_fee = history["baseFeePerGas"][-1]
+        self.fees = {"maxFeePerGas": 2 * next_base_fee + priority, "maxPriorityFeePerGas": priority}
+        self.fees_at = now
+        return self.fees
+    
+    def send(self, function_call, gas=None):
+        """Send a contract function call; returns the tx hash without waiting for it to be mined"""
+        if gas is None:
+            gas = int(function_call.estimate_gas({"from": self.account.address}) * TX_GAS_MARGIN)
+        fees = self._fee_params()
+        
+        with self.lock:
+            if self.nonce is None or time.time() - self.nonce_synced_at > NONCE_RESYNC_SECONDS:
+                self._sync_nonce()
+            tx = function_call.build_transaction({
+                "from": self.account.address,
+                "nonce": self.nonce,
+                "gas": gas,
+                "chainId": self.chain_id,
+                "type": 2,
+                **fees,
+            })
+            try:
+                tx_hash = self._sign_and_send(tx)
+            except Exception as e:
+                if "nonce too low" not in str(e).lower():
+                    raise
+                # Another client used this key; resync once and retry
+                self._sync_nonce()
+                tx["nonce"] = self.nonce
+                tx_hash = self._sign_and_send(tx)
+            pending = PendingTransaction(tx_hash, tx, time.time())
+            self.pending[self.nonce] = pending
+            self.by_hash[tx_hash] = pending
+            self.nonce += 1
+            return tx_hash
+    
+    def _sign_and_send(self, tx):
+        signed_txn = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+        return self.w3.to_hex(self.w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+    
+    def current_hash(self, tx_hash):
+        """Hash of the latest replacement of a transaction we sent"""
+        pending = self.by_hash.get(tx_hash)
+        return pending.current_hash if pending else tx_hash
+    
+    def wait_for_receipt(self, tx_hash, timeout=300, poll=2.0):
+        """Receipt of tx_hash or of whichever replacement got mined"""
+        deadline = time.time() + timeout
+        pending = None
+        while time.time() < deadline:
+            # Keep the record once seen: check_pending drops it from by_hash when the nonce is mined
+            pending = self.by_hash.get(tx_hash) or pending
+            # The original and every replacement share a nonce; at most one of them is mined
+            hashes = list(pending.hashes) if pending else [tx_hash]
+            for receipt in self._receipts(hashes):
+                if receipt is not None:
+                    return receipt
+            time.sleep(poll)
+        raise TimeoutError(f"Transaction {tx_hash} not mined after {timeout}s")
+    
+    def _receipt(self, tx_hash):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            return None
+    
+    def _receipts(self, hashes):
+        """Receipts for several hashes in one batched request when possible"""
+        if self.rpc:
+            try:
+                results = self.rpc.batch([("eth_getTransactionReceipt", [h]) for h in hashes])
+                return [None if isinstance(r, RpcError) else r for r in results]
+            except Exception:
+                pass
+        return [self._receipt(h) for h in hashes]
+    
+    def _watch_pending(self):
+        while not self.stop_event.wait(STUCK_TX_SECONDS / 3):
+            try:
+                self.check_pending()
+            except Exception as e:
+                self.message_callback(f"⚠️ Pending transaction check failed: {str(e)}")
+    
+    def check_pending(self):
+        """Forget mined transactions and replace ones stuck for too long"""
+        with self.lock:
+            pending = list(self.pending.items())
+        if not pending:
+            return
+        receipts = self._receipts([tx.current_hash for _, tx in pending])
+        mined_nonce = self.w3.eth.get_transaction_count(self.account.address, "latest")
+        
+        for (nonce, tx), receipt in zip(pending, receipts):
+            if receipt is not None or nonce < mined_nonce:
+                with self.lock:
+                    self.pending.pop(nonce, None)
+                    for tx_hash in tx.hashes:
+                        self.by_hash.pop(tx_hash, None)
+                continue
+            if time.time() - tx.sent_at >= STUCK_TX_SECONDS:
+                self._replace(nonce, tx)
+    
+    def _replace(self, nonce, pending):
+        """Re-send the same nonce with fees raised enough for nodes to accept it as a replacement"""
+        fees = self._fee_params()
+        tx = dict(pending.tx)
+        tx["maxPriorityFeePerGas"] = max(int(tx["maxPriorityFeePerGas"] * TX_REPLACEMENT_BUMP),
+                                         fees["maxPriorityFeePerGas"])
+        tx["maxFeePerGas"] = max(int(tx["maxFeePerGas"] * TX_REPLACEMENT_BUMP),
+                                 fees["maxFeePerGas"], tx["maxPriorityFeePerGas"])
+        try:
+            with self.lock:
+                new_hash = self._sign_and_send(tx)
+                pending.tx = tx
+                pending.current_hash = new_hash
+                pending.hashes.append(new_hash)
+                pending.sent_at = time.time()
+                pending.replacements += 1
+                self.by_hash[new_hash] = pending
+            self.message_callback(f"🔁 Replaced stuck transaction (nonce {nonce}) with higher fees: {new_hash}")
+        except Exception as e:
+            if "nonce too low" in str(e).lower() or "already known" in str(e).lower():
+                return  # Mined or already replaced in the meantime
+            self.message_callback(f"⚠️ Failed to replace stuck transaction (nonce {nonce}): {str(e)}")
+    
+    def stop(self):
+        self.stop_event.set()
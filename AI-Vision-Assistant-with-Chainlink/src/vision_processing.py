@@ -1,129 +1,337 @@
 import os
 import cv2
-import face_recognition
 import numpy as np
 import hashlib
 import time
-from ultralytics import YOLO
-from constants import KNOWN_FACES_DIR, YOLO_MODEL_PATH
+import threading
+from constants import (
+    KNOWN_FACES_DIR, FACE_MATCH_TOLERANCE, FACE_ENCODING_CACHE,
+    FACE_WORKER_PROCESSES, FACE_POOL_FRAME_BYTES, YOLO_BATCH_SIZE, YOLO_BATCH_WAIT_MS,
+    ERROR_REPORT_SECONDS
+)
+from face import FaceGallery, EncodingCache
+from tracker import FaceTracker
+from scheduler import DetectionScheduler
+from face_workers import FaceAnalysisPool
+from metrics import Metrics
+from detections import empty_detections, to_dicts
+from detector import YoloDetector, DetectionBatcher
+
+class FrameResult:
+    """Structured output of one perception pass over a frame.
+    
+    faces: dicts with a full-resolution "box" (top, right, bottom, left),
+    a stable "track_id", "encoding", "name", "distance" (None for unknown faces) and
+    "candidates", the closest (name, distance) pairs from the gallery.
+    detections: structured DETECTION_DTYPE array with a full-resolution
+    "box" (x1, y1, x2, y2), "confidence" and "class_id" per object, and
+    labels maps class ids to names. objects gives the same data as dicts.
+    """
+    def __init__(self, frame, faces=None, detections=None, labels=None, display_frame=None):
+        self.frame = frame
+        self.faces = faces if faces is not None else []
+        self.detections = detections if detections is not None else empty_detections()
+        self.labels = labels or {}
+        self.display_frame = display_frame
+        self.objects_age = 0  # Frames since the objects were last detected
+    
+    @property
+    def face_count(self):
+        return len(self.faces)
+    
+    @property
+    def objects(self):
+        return to_dicts(self.detections, self.labels)
 
 class VisionProcessor:
-    def __init__(self, message_callback=None):
+    def __init__(self, message_callback=None, face_workers=FACE_WORKER_PROCESSES, known_faces_dir=KNOWN_FACES_DIR,
+                 metrics=None, yolo_batch=YOLO_BATCH_SIZE, load=True):
         self.message_callback = message_callback or print
-        self.known_face_encodings = []
-        self.known_face_names = []
+        self.metrics = metrics or Metrics()
+        self.face_workers = face_workers
+        self.known_faces_dir = known_faces_dir
+        self.gallery = FaceGallery()
+        self.encoding_cache = EncodingCache(
+            os.path.join(known_faces_dir, os.path.basename(FACE_ENCODING_CACHE))
+        )
+        self.tracker = FaceTracker()
+        self.detection_scheduler = DetectionScheduler()
         self.yolo = None
+        self.yolo_lock = threading.Lock()
+        self.yolo_batch = yolo_batch
+        self.yolo_batcher = None
         self.last_detection_time = {}
         self.unknown_face_cooldown = {}
-        self.load_models()
-        self.load_known_faces()
+        self.face_pool = None
+        self.last_error_report = {}
+        if load:
+            self.load_models()
+            self.start_face_pool()
+            self.load_known_faces()
+    
+    def report_error(self, stage, label, error):
+        """Count a per-frame failure and tell the user, at most once per ERROR_REPORT_SECONDS per stage"""
+        self.metrics.increment("errors")
+        self.metrics.increment(f"{stage}_errors")
+        now = time.time()
+        if now - self.last_error_report.get(stage, 0.0) >= ERROR_REPORT_SECONDS:
+            self.last_error_report[stage] = now
+            self.message_callback(f"❌ {label} failed: {str(error)}")
+    
+    @property
+    def known_face_names(self):
+        return self.gallery.names
+    
+    @property
+    def known_face_encodings(self):
+        return self.gallery.encodings
     
     def load_models(self):
         try:
-            self.yolo = YOLO(YOLO_MODEL_PATH)
-            self.message_callback("✅ YOLO model loaded successfully!")
+            self.yolo = YoloDetector(message_callback=self.message_callback).load()
         except Exception as e:
             self.message_callback(f"❌ YOLO model failed to load: {str(e)}")
             try:
-                self.yolo = YOLO("yolov8n.pt")
+                self.yolo = YoloDetector("pytorch", model_path="yolov8n.pt",
+                                         message_callback=self.message_callback).load()
                 self.message_callback("✅ YOLO model downloaded and loaded!")
             except Exception as e2:
+                self.yolo = None
                 self.message_callback(f"❌ YOLO download failed: {str(e2)}")
+        self.start_yolo_batcher()
+    
+    def start_yolo_batcher(self):
+        """Share YOLO calls across concurrent analyze_frame callers when yolo_batch > 1"""
+        if self.yolo and self.yolo_batch > 1:
+            self.yolo_batcher = DetectionBatcher(
+                self.yolo, max_batch=self.yolo_batch, max_wait=YOLO_BATCH_WAIT_MS / 1000.0,
+                lock=self.yolo_lock, metrics=self.metrics
+            )
+    
+    def start_face_pool(self):
+        """Move dlib detection/encoding to a pool of face_workers processes"""
+        if self.face_workers <= 0:
+            return
+        try:
+            self.face_pool = FaceAnalysisPool(
+                self.face_workers, FACE_POOL_FRAME_BYTES,
+                message_callback=self.message_callback
+            )
+            self.face_pool.warm_up()
+        except Exception as e:
+            self.message_callback(f"⚠️ Face worker pool unavailable, analysing in-process: {str(e)}")
+            if self.face_pool:
+                self.face_pool.shutdown()
+            self.face_pool = None
+    
+    def shutdown(self):
+        if self.yolo_batcher:
+            self.yolo_batcher.stop()
+            self.yolo_batcher = None
+        if self.face_pool:
+            self.face_pool.shutdown()
+            self.face_pool = None
     
     def load_known_faces(self):
-        if not os.path.exists(KNOWN_FACES_DIR):
-            os.makedirs(KNOWN_FACES_DIR)
-            
-        self.known_face_encodings = []
-        self.known_face_names = []
+        """Build the gallery, re-encoding only images that are new or changed"""
+        if not os.path.exists(self.known_faces_dir):
+            os.makedirs(self.known_faces_dir)
+        
+        try:
+            self.encoding_cache.load()
+        except Exception as e:
+            self.message_callback(f"⚠️ Face encoding cache unreadable, rebuilding: {str(e)}")
+        
+        encodings = []
+        names = []
+        image_paths = []
         
-        for filename in os.listdir(KNOWN_FACES_DIR):
+        for filename in sorted(os.listdir(self.known_faces_dir)):
             if filename.lower().endswith(('.jpg', '.png', '.jpeg')):
                 try:
-                    image_path = os.path.join(KNOWN_FACES_DIR, filename)
-                    image = face_recognition.load_image_file(image_path)
-                    encodings = face_recognition.face_encodings(image)
-                    if encodings:
-                        self.known_face_encodings.append(encodings[0])
-                        self.known_face_names.append(os.path.splitext(filename)[0])
+                    image_path = os.path.join(self.known_faces_dir, filename)
+                    image_paths.append(image_path)
+                    hit, encoding = self.encoding_cache.lookup(image_path)
+                    if not hit:
+                        encoding = self.encode_image_file(image_path)
+                        self.encoding_cache.put(image_path, encoding)
+                    if encoding is not None:
+                        encodings.append(encoding)
+                        names.append(os.path.splitext(filename)[0])
                         self.message_callback(f"✅ Loaded face: {os.path.splitext(filename)[0]}")
                 except Exception as e:
                     self.message_callback(f"❌ Failed to load {filename}: {str(e)}")
+        
+        self.gallery.reset(encodings, names)
+        self.encoding_cache.prune(image_paths)
+        self.save_encoding_cache()
+    
+    def encode_image_file(self, image_path):
+        import face_recognition
+        image = face_recognition.load_image_file(image_path)
+        face_encodings = face_recognition.face_encodings(image)
+        return face_encodings[0] if face_encodings else None
     
-    def process_frame(self, frame):
+    def save_encoding_cache(self):
         try:
-            display_frame = frame.copy()
-            small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
-            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-            
-            face_locations = face_recognition.face_locations(
-                rgb_small_frame, 
-                model="hog",
-                number_of_times_to_upsample=1
-            )
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+            self.encoding_cache.save()
+        except Exception as e:
+            self.message_callback(f"⚠️ Failed to save face encoding cache: {str(e)}")
+    
+    def process_frame(self, frame, in_place=False):
+        """Run one perception pass and draw it onto the frame (or a copy of it)"""
+        try:
+            result = self.analyze_frame(frame)
+            display_frame = frame if in_place else frame.copy()
+            result.display_frame = self.annotate_frame(display_frame, result)
+            return result
             
-            current_time = time.time()
-            face_count = 0
+        except Exception as e:
+            self.metrics.increment("errors")
+            self.message_callback(f"❌ Processing error: {str(e)}")
+            return FrameResult(frame, display_frame=frame)
+    
+    def analyze_frame(self, frame, stream=None):
+        """Detect, encode and identify faces and objects in a single pass.
+        
+        stream: a StreamContext whose tracker and YOLO schedule are used
+        instead of the processor's own, for multi-camera setups.
+        """
+        started = time.perf_counter()
+        metrics = self.metrics
+        tracker = stream.tracker if stream else self.tracker
+        detection_scheduler = stream.detection_scheduler if stream else self.detection_scheduler
+        result = FrameResult(frame)
+        small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+        
+        # With a worker pool the RGB conversion is written straight into shared memory
+        # and dlib runs in the workers, off the GIL
+        use_pool = self.face_pool and self.face_pool.fits(small_frame.shape)
+        shared = self.face_pool.allocate(small_frame.shape) if use_pool else None
+        try:
+            if shared:
+                rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB, dst=shared.array)
+            else:
+                # dlib only loads in this process when there is no worker pool
+                import face_recognition
+                rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
             
-            for i, (face_encoding, (top, right, bottom, left)) in enumerate(zip(face_encodings, face_locations)):
-                top = int(top * 2)
-                right = int(right * 2)
-                bottom = int(bottom * 2)
-                left = int(left * 2)
-                
-                matches = face_recognition.compare_faces(self.known_face_encodings, face_encoding, tolerance=0.6)
-                name = "Unknown"
-                color = (0, 0, 255)
-                confidence = 0
-                
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = self.known_face_names[first_match_index]
-                    color = (0, 255, 0)
-                    
-                    face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
-                    confidence = 1 - face_distances[first_match_index]
-                
-                cv2.rectangle(display_frame, (left, top), (right, bottom), color, 3)
-                label = f"{name}"
-                if confidence > 0:
-                    label += f" ({confidence:.2f})"
-                
-                cv2.rectangle(display_frame, (left, bottom - 40), (right, bottom), color, cv2.FILLED)
-                cv2.putText(display_frame, label, (left + 6, bottom - 6), 
-                           cv2.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 2)
-                
-                face_count += 1
+            with metrics.timer("face_detect"):
+                if shared:
+                    face_locations = shared.detect().result()
+                else:
+                    face_locations = face_recognition.face_locations(
+                        rgb_small_frame, 
+                        model="hog",
+                        number_of_times_to_upsample=1
+                    )
+            boxes = [(int(top * 2), int(right * 2), int(bottom * 2), int(left * 2))
+                     for top, right, bottom, left in face_locations]
             
-            # Object detection with YOLO
-            if self.yolo:
-                try:
-                    results = self.yolo(small_frame, verbose=False, conf=0.3)
-                    if results and len(results) > 0:
-                        boxes = results[0].boxes
-                        if boxes is not None:
-                            object_count = 0
-                            for box in boxes:
-                                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                                conf = float(box.conf[0])
-                                cls = int(box.cls[0])
-                                
-                                if conf > 0.3:
-                                    x1, y1, x2, y2 = x1*2, y1*2, x2*2, y2*2
-                                    label = f"{results[0].names[cls]} {conf:.2f}"
-                                    cv2.rectangle(display_frame, (x1, y1), (x2, y2), (255, 165, 0), 2)
-                                    cv2.putText(display_frame, label, (x1, y1 - 10), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 165, 0), 2)
-                                    object_count += 1
-                except Exception as e:
-                    pass
+            # Only new tracks and tracks due for re-verification pay for the 128-d encoding
+            tracks, to_encode = tracker.update(boxes)
+            if to_encode:
+                locations = [face_locations[i] for i in to_encode]
+                with metrics.timer("encode"):
+                    if shared:
+                        face_encodings = shared.encode(locations).result()
+                    else:
+                        face_encodings = face_recognition.face_encodings(rgb_small_frame, locations)
+                with metrics.timer("match"):
+                    matches = self.gallery.match(face_encodings, tolerance=FACE_MATCH_TOLERANCE)
+                for i, face_encoding, match in zip(to_encode, face_encodings, matches):
+                    tracks[i].set_identity(face_encoding, match)
+        finally:
+            if shared:
+                shared.release()
+        
+        for box, track in zip(boxes, tracks):
+            result.faces.append({
+                "box": box,
+                "track_id": track.id,
+                "encoding": track.encoding,
+                "name": track.name,
+                "distance": track.distance,
+                "candidates": track.candidates,
+            })
+        
+        # Object detection with YOLO, on the frames the scheduler picks
+        face_time = time.perf_counter() - started
+        if self.yolo and detection_scheduler.should_run(face_time):
+            yolo_started = time.perf_counter()
+            result.detections = self.detect_objects(small_frame)
+            yolo_time = time.perf_counter() - yolo_started
+            detection_scheduler.record_run(result.detections, yolo_time)
+            metrics.record("yolo", yolo_time)
+        else:
+            last = detection_scheduler.record_skip()
+            result.detections = last if last is not None else empty_detections()
+            metrics.increment("yolo_skipped")
+        result.labels = self.class_names
+        result.objects_age = detection_scheduler.objects_age
+        detection_scheduler.record_frame(face_time)
+        metrics.record("analyze", time.perf_counter() - started)
+        
+        return result
+    
+    @property
+    def class_names(self):
+        """Class id -> label mapping of the loaded detector"""
+        return self.yolo.names if self.yolo else {}
+    
+    def detect_objects(self, small_frame, scale=2):
+        """Run YOLO on a downscaled frame and return a full-resolution detection array"""
+        try:
+            if self.yolo_batcher:
+                return self.yolo_batcher.submit(small_frame, scale).result()
+            # Ultralytics predictors are not thread-safe across pipeline workers
+            with self.yolo_lock:
+                return self.yolo.predict(small_frame, conf=0.3, scale=scale)
+        except Exception as e:
+            self.report_error("yolo", "Object detection", e)
+        return empty_detections()
+    
+    def detect_objects_batch(self, small_frames, scale=2):
+        """Run YOLO once over several downscaled frames; one detection array per frame"""
+        if not self.yolo or not small_frames:
+            return [empty_detections() for _ in small_frames]
+        try:
+            with self.yolo_lock:
+                return self.yolo.predict_batch(small_frames, conf=0.3, scales=[scale] * len(small_frames))
+        except Exception as e:
+            self.report_error("yolo_batch", "Batched detection", e)
+            return [empty_detections() for _ in small_frames]
+    
+    def annotate_frame(self, display_frame, result):
+        """Draw the faces and objects of a FrameResult onto display_frame"""
+        started = time.perf_counter()
+        for face in result.faces:
+            top, right, bottom, left = face["box"]
+            known = face["distance"] is not None
+            color = (0, 255, 0) if known else (0, 0, 255)
             
-            return display_frame, face_count
+            cv2.rectangle(display_frame, (left, top), (right, bottom), color, 3)
+            label = f"{face['name']}"
+            if known:
+                label += f" ({1 - face['distance']:.2f})"
             
-        except Exception as e:
-            self.message_callback(f"❌ Processing error: {str(e)}")
-            return frame, 0
+            cv2.rectangle(display_frame, (left, bottom - 40), (right, bottom), color, cv2.FILLED)
+            cv2.putText(display_frame, label, (left + 6, bottom - 6), 
+                       cv2.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 2)
+        
+        # Pull the columns out once instead of indexing the array per box
+        detections = result.detections
+        labels = result.labels
+        for (x1, y1, x2, y2), conf, cls in zip(
+            detections["box"].tolist(), detections["confidence"].tolist(), detections["class_id"].tolist()
+        ):
+            label = f"{labels.get(cls, cls)} {conf:.2f}"
+            cv2.rectangle(display_frame, (x1, y1), (x2, y2), (255, 165, 0), 2)
+            cv2.putText(display_frame, label, (x1, y1 - 10), 
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 165, 0), 2)
+        
+        self.metrics.record("annotate", time.perf_counter() - started)
+        return display_frame
     
     def generate_face_hash(self, face_img):
         try:
@@ -136,9 +344,15 @@ class VisionProcessor:
     
     def register_face(self, face_img, name):
         try:
-            filename = f"{KNOWN_FACES_DIR}/{name}.jpg"
+            filename = os.path.join(self.known_faces_dir, f"{name}.jpg")
             cv2.imwrite(filename, face_img)
-            self.load_known_faces()
+            
+            # Encode just the new image and append it instead of rebuilding the gallery
+            encoding = self.encode_image_file(filename)
+            self.encoding_cache.put(filename, encoding)
+            self.save_encoding_cache()
+            if encoding is not None:
+                self.gallery.set(encoding, name)
             return True
         except Exception as e:
             self.message_callback(f"❌ Face registration failed: {str(e)}")
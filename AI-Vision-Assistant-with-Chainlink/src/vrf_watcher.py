@@ -0,0 +1,115 @@
+import time
+import threading
+from concurrent.futures import Future
+from constants import VRF_POLL_SECONDS, VRF_TIMEOUT_SECONDS, LOG_BLOCK_RANGE
+
+class VRFWatcher:
+    """Resolves VRF mint requests from one shared, incremental log poll.
+    
+    watch(request_id) returns a Future for the minted token id. A single
+    background loop follows NFTMinted logs over the block range it has
+    not seen yet; whenever new mints appear it looks up
+    s_requestIdToTokenId for every outstanding request in one batched
+    read and resolves the ones that were fulfilled. Outstanding requests
+    cost nothing extra however many there are.
+    """
+    def __init__(self, w3, contract, reader, poll_interval=VRF_POLL_SECONDS, message_callback=None):
+        self.w3 = w3
+        self.contract = contract
+        self.reader = reader
+        self.poll_interval = poll_interval
+        self.message_callback = message_callback or print
+        self.minted_topic = w3.to_hex(w3.keccak(text="NFTMinted(uint256,address)"))
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.unchecked = set()
+        self.next_block = None
+        self.wakeup = threading.Event()
+        self.thread = None
+    
+    def request_id_from_receipt(self, receipt):
+        """requestId emitted by requestNFT/requestNFTBatch in this transaction"""
+        from web3.logs import DISCARD
+        events = self.contract.events.NFTRequested().process_receipt(receipt, errors=DISCARD)
+        if not events:
+            raise ValueError("No NFTRequested event in transaction receipt")
+        return events[0]["args"]["requestId"]
+    
+    def watch(self, request_id, timeout=VRF_TIMEOUT_SECONDS):
+        """Future resolving to the token id minted for request_id"""
+        with self.lock:
+            entry = self.pending.get(request_id)
+            if entry is None:
+                entry = self.pending[request_id] = (Future(), time.time() + timeout)
+                self.unchecked.add(request_id)
+            if self.next_block is None:
+                # Mints can land in the same block as the request at the earliest
+                self.next_block = self.w3.eth.block_number
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._loop, daemon=True)
+                self.thread.start()
+        # Check straight away in case the request was already fulfilled
+        self.wakeup.set()
+        return entry[0]
+    
+    def _loop(self):
+        while True:
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                self.message_callback(f"⚠️ VRF watcher poll failed: {str(e)}")
+    
+    def _new_mints(self):
+        """Scan NFTMinted logs from the last seen block up to the chain head"""
+        latest = self.w3.eth.block_number
+        found = False
+        start = self.next_block
+        while start <= latest:
+            end = min(start + LOG_BLOCK_RANGE - 1, latest)
+            logs = self.w3.eth.get_logs({
+                "address": self.contract.address,
+                "topics": [self.minted_topic],
+                "fromBlock": start,
+                "toBlock": end,
+            })
+            found = found or bool(logs)
+            start = end + 1
+        self.next_block = latest + 1
+        return found
+    
+    def poll(self):
+        minted = self._new_mints()
+        with self.lock:
+            # A request seen for the first time may already be fulfilled in an older block
+            to_check = list(self.pending) if minted else list(self.unchecked)
+            self.unchecked.clear()
+        
+        if to_check:
+            token_ids = self.reader.read([
+                (self.contract, "s_requestIdToTokenId", (request_id,)) for request_id in to_check
+            ])
+            for request_id, token_id in zip(to_check, token_ids):
+                if token_id:
+                    self._resolve(request_id, result=token_id)
+        
+        now = time.time()
+        with self.lock:
+            expired = [rid for rid, (_, deadline) in self.pending.items() if now > deadline]
+        for request_id in expired:
+            self._resolve(request_id, error=TimeoutError(f"VRF request {request_id} not fulfilled in time"))
+    
+    def _resolve(self, request_id, result=None, error=None):
+        with self.lock:
+            entry = self.pending.pop(request_id, None)
+        if entry is None:
+            return
+        if error is not None:
+            entry[0].set_exception(error)
+        else:
+            entry[0].set_result(result)
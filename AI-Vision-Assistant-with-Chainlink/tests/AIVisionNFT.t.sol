@@ -0,0 +1,140 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+import {Test} from "forge-std/Test.sol";
+import {VRFCoordinatorV2_5Mock} from "@chainlink/contracts/src/v0.8/vrf/mocks/VRFCoordinatorV2_5Mock.sol";
+import {AIVisionNFT} from "../src/AIproject.sol";
+
+contract AIVisionNFTTest is Test {
+    uint32 constant CALLBACK_GAS_LIMIT = 500000;
+
+    VRFCoordinatorV2_5Mock coordinator;
+    AIVisionNFT nft;
+    uint256 subId;
+    address user = makeAddr("user");
+
+    function setUp() public {
+        coordinator = new VRFCoordinatorV2_5Mock(0.1 ether, 1e9, 4e15);
+        subId = coordinator.createSubscription();
+        coordinator.fundSubscription(subId, 100 ether);
+        nft = deploy(CALLBACK_GAS_LIMIT);
+    }
+
+    function deploy(uint32 callbackGasLimit) internal returns (AIVisionNFT deployed) {
+        deployed = new AIVisionNFT(subId, address(coordinator), bytes32(0), callbackGasLimit, 3, 1);
+        coordinator.addConsumer(subId, address(deployed));
+        vm.prank(user);
+        deployed.registerUser("face-hash");
+    }
+
+    // Metadata URIs as long as the CIDv0 ones the app pins
+    function uris(uint256 count) internal pure returns (string[] memory list) {
+        list = new string[](count);
+        for (uint256 i = 0; i < count; i++) {
+            list[i] = string.concat("ipfs://QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG", vm.toString(i));
+        }
+    }
+
+    function requestBatch(uint256 count) internal returns (uint256 requestId, string[] memory list) {
+        list = uris(count);
+        vm.prank(user);
+        requestId = nft.requestNFTBatch(list);
+    }
+
+    function test_SingleMint() public {
+        vm.prank(user);
+        uint256 requestId = nft.requestNFT("ipfs://single");
+        coordinator.fulfillRandomWords(requestId, address(nft));
+
+        assertEq(nft.getTokenIdByRequest(requestId), 1);
+        assertEq(nft.s_requestIdToTokenCount(requestId), 1);
+        assertEq(nft.ownerOf(1), user);
+        assertEq(nft.tokenURI(1), "ipfs://single");
+        assertEq(nft.getTokenCounter(), 1);
+    }
+
+    function test_BatchMint() public {
+        (uint256 requestId, string[] memory list) = requestBatch(3);
+        coordinator.fulfillRandomWords(requestId, address(nft));
+
+        uint256[] memory tokenIds = nft.getTokenIdsByRequest(requestId);
+        assertEq(tokenIds.length, 3);
+        for (uint256 i = 0; i < 3; i++) {
+            assertEq(tokenIds[i], i + 1);
+            assertEq(nft.ownerOf(i + 1), user);
+            assertEq(nft.tokenURI(i + 1), list[i]);
+        }
+        assertEq(nft.getTokenIdByRequest(requestId), 1);
+        assertEq(nft.getTokenCounter(), 3);
+    }
+
+    function test_TokenIdsFollowFulfilmentOrder() public {
+        (uint256 batchRequest, ) = requestBatch(2);
+        vm.prank(user);
+        uint256 singleRequest = nft.requestNFT("ipfs://single");
+
+        // Fulfilled out of request order: each request still maps to its own tokens
+        coordinator.fulfillRandomWords(singleRequest, address(nft));
+        coordinator.fulfillRandomWords(batchRequest, address(nft));
+
+        assertEq(nft.getTokenIdByRequest(singleRequest), 1);
+        assertEq(nft.tokenURI(1), "ipfs://single");
+        uint256[] memory tokenIds = nft.getTokenIdsByRequest(batchRequest);
+        assertEq(tokenIds.length, 2);
+        assertEq(tokenIds[0], 2);
+        assertEq(tokenIds[1], 3);
+    }
+
+    function test_UnfulfilledRequestHasNoTokens() public {
+        (uint256 requestId, ) = requestBatch(2);
+        assertEq(nft.getTokenIdByRequest(requestId), 0);
+        assertEq(nft.getTokenIdsByRequest(requestId).length, 0);
+    }
+
+    function test_MaxBatchSizeFollowsCallbackGas() public {
+        uint256 expected = 1 + (nft.MAX_CALLBACK_GAS() - CALLBACK_GAS_LIMIT) / nft.BATCH_GAS_PER_TOKEN();
+        assertEq(nft.maxBatchSize(), expected);
+        assertLe(nft.maxBatchSize(), nft.MAX_BATCH_SIZE());
+        assertEq(deploy(nft.MAX_CALLBACK_GAS()).maxBatchSize(), 1);
+        assertEq(deploy(nft.MAX_CALLBACK_GAS() + 1).maxBatchSize(), 0);
+    }
+
+    function test_FullBatchFitsCallbackGas() public {
+        uint256 size = nft.maxBatchSize();
+        (uint256 requestId, ) = requestBatch(size);
+        coordinator.fulfillRandomWords(requestId, address(nft));
+
+        // The mock swallows a callback that runs out of gas, so check the mints happened
+        assertEq(nft.getTokenCounter(), size);
+        assertEq(nft.getTokenIdsByRequest(requestId).length, size);
+    }
+
+    function test_RevertWhen_BatchExceedsMaxBatchSize() public {
+        string[] memory list = uris(nft.maxBatchSize() + 1);
+        vm.expectRevert(bytes("Invalid batch size"));
+        vm.prank(user);
+        nft.requestNFTBatch(list);
+    }
+
+    function test_RevertWhen_BatchIsEmpty() public {
+        string[] memory list = uris(0);
+        vm.expectRevert(bytes("Invalid batch size"));
+        vm.prank(user);
+        nft.requestNFTBatch(list);
+    }
+
+    function test_RevertWhen_NoBatchFitsCallbackGas() public {
+        AIVisionNFT tooGreedy = deploy(nft.MAX_CALLBACK_GAS() + 1);
+        string[] memory list = uris(1);
+        vm.expectRevert(bytes("Invalid batch size"));
+        vm.prank(user);
+        tooGreedy.requestNFTBatch(list);
+    }
+
+    function test_RevertWhen_UserNotRegistered() public {
+        string[] memory list = uris(1);
+        vm.expectRevert(bytes("User not registered"));
+        vm.prank(makeAddr("stranger"));
+        nft.requestNFTBatch(list);
+    }
+}
@@ -0,0 +1,119 @@
+"""Local http.server stand-ins for the remote services the app talks to"""
+import json
+import time
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class StandInServer:
+    """Serves handle(method, path, headers, body) -> (status, headers, body) on a free localhost port"""
+    def __init__(self):
+        self.requests = []
+        stand_in = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                stand_in.requests.append((self.command, self.path, dict(self.headers), body))
+                status, headers, payload = stand_in.handle(self.command, self.path, self.headers, body)
+                if isinstance(payload, (dict, list)):
+                    payload = json.dumps(payload).encode()
+                    headers = {"Content-Type": "application/json", **headers}
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            do_GET = do_POST = _serve
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        # Clients that time out close the socket before the reply; that is expected here
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    def handle(self, method, path, headers, body):
+        raise NotImplementedError
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+class JsonRpcStandIn(StandInServer):
+    """Ethereum JSON-RPC node answering eth_call from a {(to, selector): result} table.
+    
+    Batch responses are returned in reverse order to exercise id matching;
+    unknown calls get a JSON-RPC error entry.
+    """
+    def __init__(self, calls=None):
+        super().__init__()
+        self.calls = {(to.lower(), selector): result for (to, selector), result in (calls or {}).items()}
+    
+    def answer(self, request):
+        if request["method"] == "eth_call":
+            call = request["params"][0]
+            result = self.calls.get((call["to"].lower(), call["data"][:10]))
+            if result is not None:
+                return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+        return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": "execution reverted"}}
+    
+    def handle(self, method, path, headers, body):
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return 200, {}, [self.answer(request) for request in reversed(payload)]
+        return 200, {}, self.answer(payload)
+
+class PinataStandIn(StandInServer):
+    """Pinata pinning API that pins files under their real CID.
+    
+    script is a list of (status, headers, body) replies served, in arrival
+    order, before normal behaviour; "hang" stalls the reply for hang seconds
+    to trigger client timeouts. Files named in fail_files always get a 500.
+    """
+    def __init__(self, script=(), fail_files=(), hang=1.0):
+        super().__init__()
+        self.script = list(script)
+        self.fail_files = set(fail_files)
+        self.hang = hang
+        self.lock = threading.Lock()
+    
+    def upload(self, headers, body):
+        """(file bytes, filename, pinataOptions) from a pinFileToIPFS form"""
+        message = BytesParser(policy=HTTP).parsebytes(
+            b"Content-Type: " + headers["Content-Type"].encode() + b"\r\n\r\n" + body
+        )
+        data, filename, options = b"", None, {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                data, filename = part.get_payload(decode=True), part.get_filename()
+            elif name == "pinataOptions":
+                options = json.loads(part.get_payload(decode=True))
+        return data, filename, options
+    
+    def handle(self, method, path, headers, body):
+        from cid import compute_cid
+        with self.lock:
+            step = self.script.pop(0) if self.script else None
+        if step == "hang":
+            time.sleep(self.hang)
+            step = None
+        if step is not None:
+            return step
+        if path != "/pinning/pinFileToIPFS":
+            return 404, {}, {"error": "not found"}
+        data, filename, options = self.upload(headers, body)
+        if filename in self.fail_files:
+            return 500, {}, {"error": "pin failed"}
+        return 200, {}, {"IpfsHash": compute_cid(data, options.get("cidVersion", 0)), "PinSize": len(data)}
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("cv2")
+
+from batch import frame_record
+
+FACE = {"box": (1, 2, 3, 4), "track_id": 7, "name": "Ada", "distance": 0.3, "candidates": [("Ada", 0.3)]}
+
+def result():
+    return SimpleNamespace(faces=[FACE], objects=[])
+
+def test_track_ids_only_when_requested():
+    assert "track_id" not in frame_record("a.jpg", 0, None, result())["faces"][0]
+    record = frame_record("clip.mp4", 5, 166.0, result(), with_tracks=True)
+    assert record["faces"][0]["track_id"] == 7
+    assert record["faces"][0]["candidates"] == [["Ada", 0.3]]
@@ -0,0 +1,62 @@
+import json
+import os
+from types import SimpleNamespace
+import pytest
+
+web3 = pytest.importorskip("web3")
+
+from blockchain import BlockchainManager
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+NFT_ADDRESS = "0x00000000000000000000000000000000000000A1"
+
+class FakeSender:
+    def __init__(self, fail_on):
+        self.fail_on = fail_on
+        self.batches = []
+    
+    def send(self, function_call):
+        if len(self.batches) == self.fail_on:
+            raise ValueError("insufficient funds for gas")
+        self.batches.append(function_call.args[0])
+        return f"0x{len(self.batches):064x}"
+
+def manager(fail_on, batch_size=2):
+    w3 = web3.Web3()
+    with open(os.path.join(SRC, "nft_contract_abi.json")) as f:
+        abi = json.load(f)
+    messages = []
+    blockchain = BlockchainManager(messages.append, connect=False)
+    blockchain.nft_contract = w3.eth.contract(address=w3.to_checksum_address(NFT_ADDRESS), abi=abi)
+    blockchain.sender = FakeSender(fail_on)
+    blockchain.max_batch_size = batch_size
+    return blockchain, messages
+
+def test_batch_mint_chunks_by_max_batch_size():
+    blockchain, _ = manager(fail_on=None)
+    uris = [f"ipfs://meta{i}" for i in range(5)]
+    sent, unsent = blockchain.request_nft_mint_batch(uris)
+    assert [chunk for chunk, _ in sent] == [uris[0:2], uris[2:4], uris[4:5]]
+    assert unsent == []
+
+def test_batch_mint_reports_sent_chunks_and_remainder_on_failure():
+    blockchain, messages = manager(fail_on=1)
+    uris = [f"ipfs://meta{i}" for i in range(5)]
+    sent, unsent = blockchain.request_nft_mint_batch(uris)
+    assert sent == [(uris[0:2], f"0x{1:064x}")]
+    assert unsent == uris[2:]
+    assert "2 URIs sent in 1 transactions, 3 not sent" in messages[-1]
+
+def test_batch_mint_refuses_when_no_batch_fits():
+    blockchain, _ = manager(fail_on=None, batch_size=0)
+    sent, unsent = blockchain.request_nft_mint_batch(["ipfs://meta"])
+    assert sent == [] and unsent == ["ipfs://meta"]
+
+def test_registered_face_hash_is_looked_up_by_account():
+    blockchain = BlockchainManager(connect=False)
+    assert blockchain.get_registered_face_hash() is None
+    registrations = {"0xUser": "abc123"}
+    blockchain.indexer = SimpleNamespace(face_hash_for_address=registrations.get)
+    blockchain.account = SimpleNamespace(address="0xUser")
+    assert blockchain.get_registered_face_hash() == "abc123"
+    assert blockchain.get_registered_face_hash("0xOther") is None
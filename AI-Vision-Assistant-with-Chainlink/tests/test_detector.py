@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import wait
+import pytest
+
+from detector import DetectionBatcher
+
+class FakeDetector:
+    def __init__(self):
+        self.release = threading.Event()
+    
+    def predict_batch(self, images, conf, scales):
+        self.release.wait(5)
+        return list(images)
+
+class BrokenMetrics:
+    def record(self, name, seconds):
+        raise ValueError("metrics backend gone")
+
+def test_submit_after_stop_raises():
+    detector = FakeDetector()
+    detector.release.set()
+    batcher = DetectionBatcher(detector, max_batch=2, max_wait=0.01)
+    assert batcher.submit("a").result(5) == "a"
+    batcher.stop()
+    with pytest.raises(RuntimeError):
+        batcher.submit("b")
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_loop_exit_fails_every_waiting_request():
+    detector = FakeDetector()
+    batcher = DetectionBatcher(detector, max_batch=1, max_wait=0.01, metrics=BrokenMetrics())
+    futures = [batcher.submit(i) for i in range(3)]
+    detector.release.set()
+    
+    done, pending = wait(futures, timeout=5)
+    assert not pending
+    assert all(isinstance(future.exception(), RuntimeError) for future in futures)
+    with pytest.raises(RuntimeError):
+        batcher.submit("late")
+    batcher.thread.join(5)
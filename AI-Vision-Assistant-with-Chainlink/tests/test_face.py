@@ -0,0 +1,29 @@
+import threading
+import numpy as np
+
+from face import FaceGallery
+
+def test_concurrent_set_keeps_one_row_per_name():
+    gallery = FaceGallery(dim=4)
+    start = threading.Barrier(8)
+    
+    def writer(value):
+        start.wait()
+        for _ in range(200):
+            gallery.set(np.full(4, value), "Ada")
+    
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert gallery.names == ["Ada"]
+    assert len(gallery) == 1
+
+def test_set_overwrites_existing_row():
+    gallery = FaceGallery(dim=4)
+    gallery.add(np.zeros(4), "Ada")
+    assert gallery.set(np.ones(4), "Ada") == 0
+    assert gallery.set(np.ones(4), "Bob") == 1
+    assert gallery.encodings[0].tolist() == [1.0] * 4
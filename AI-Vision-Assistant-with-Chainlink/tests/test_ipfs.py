@@ -0,0 +1,93 @@
+import time
+import pytest
+
+pytest.importorskip("cv2")
+
+from cid import compute_cid
+from constants import IPFS_CID_VERSION
+from ipfs import PinataClient, PinataError, PinCache, IPFSManager
+from standins import PinataStandIn
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+def client(pinata, **kwargs):
+    options = {"timeout": (1, 0.3), "max_retries": 3, "backoff": 0.01, "workers": 4}
+    options.update(kwargs)
+    return PinataClient("key", "secret", base_url=pinata.url, **options)
+
+def test_pin_file_returns_local_cid():
+    with PinataStandIn() as pinata:
+        assert client(pinata).pin_file(PNG, cid_version=1) == compute_cid(PNG, 1)
+        assert client(pinata).pin_file(PNG, cid_version=0) == compute_cid(PNG, 0)
+
+def test_retries_rate_limits_and_server_errors():
+    with PinataStandIn(script=[(429, {}, {}), (503, {}, {}), (502, {}, {})]) as pinata:
+        assert client(pinata).pin_file(PNG) == compute_cid(PNG, IPFS_CID_VERSION)
+    assert len(pinata.requests) == 4
+
+def test_honours_retry_after():
+    with PinataStandIn(script=[(429, {"Retry-After": "1"}, {})]) as pinata:
+        started = time.monotonic()
+        client(pinata).pin_file(PNG)
+    assert time.monotonic() - started >= 1
+
+def test_gives_up_after_max_retries():
+    with PinataStandIn(script=[(500, {}, {})] * 4) as pinata:
+        with pytest.raises(PinataError) as error:
+            client(pinata).pin_file(PNG)
+    assert error.value.status == 500
+    assert len(pinata.requests) == 4
+
+def test_client_errors_are_not_retried():
+    with PinataStandIn(script=[(401, {}, {"error": "bad key"})]) as pinata:
+        with pytest.raises(PinataError) as error:
+            client(pinata).pin_file(PNG)
+    assert error.value.status == 401
+    assert len(pinata.requests) == 1
+
+def test_read_timeout_is_retried():
+    with PinataStandIn(script=["hang"]) as pinata:
+        assert client(pinata).pin_file(PNG) == compute_cid(PNG, IPFS_CID_VERSION)
+    assert len(pinata.requests) == 2
+
+def test_timeouts_exhaust_retries():
+    with PinataStandIn(script=["hang"] * 2) as pinata:
+        with pytest.raises(PinataError):
+            client(pinata, max_retries=1).pin_file(PNG)
+
+def test_malformed_response_raises_pinata_error():
+    with PinataStandIn(script=[(200, {}, {"error": "no hash"}), (200, {}, b"<html>")]) as pinata:
+        with pytest.raises(PinataError):
+            client(pinata).pin_file(PNG)
+        with pytest.raises(PinataError):
+            client(pinata).pin_file(PNG)
+
+def test_pin_files_keeps_order_and_isolates_failures():
+    files = [(PNG + bytes([i]), f"sketch_{i}.png", "image/png") for i in range(6)]
+    with PinataStandIn(fail_files={"sketch_2.png"}) as pinata:
+        results = client(pinata, max_retries=0).pin_files(files)
+    assert isinstance(results[2], PinataError)
+    assert [r for i, r in enumerate(results) if i != 2] == [
+        compute_cid(data, IPFS_CID_VERSION) for i, (data, _, _) in enumerate(files) if i != 2
+    ]
+
+def manager(pinata, tmp_path):
+    ipfs = IPFSManager(message_callback=lambda message: None)
+    ipfs.client = client(pinata)
+    ipfs.pin_cache = PinCache(str(tmp_path / "pins.json"))
+    return ipfs
+
+def test_pin_bytes_skips_repeat_uploads(tmp_path):
+    with PinataStandIn() as pinata:
+        ipfs = manager(pinata, tmp_path)
+        first = ipfs.pin_bytes(PNG, "sketch.png", "image/png")
+        assert ipfs.pin_bytes(PNG, "sketch.png", "image/png") == first
+    assert len(pinata.requests) == 1
+    assert PinCache(str(tmp_path / "pins.json")).get(first) == first
+
+def test_pin_cache_is_keyed_by_local_cid_when_pinata_disagrees(tmp_path):
+    with PinataStandIn(script=[(200, {}, {"IpfsHash": "QmPinataHash"})]) as pinata:
+        ipfs = manager(pinata, tmp_path)
+        assert ipfs.pin_bytes(PNG, "sketch.png", "image/png") == "QmPinataHash"
+        assert ipfs.pin_bytes(PNG, "sketch.png", "image/png") == "QmPinataHash"
+    assert len(pinata.requests) == 1
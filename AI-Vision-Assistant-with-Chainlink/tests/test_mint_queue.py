@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import Future
+import pytest
+
+pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+import mint_queue
+from blockchain import TransactionReverted
+from cid import compute_cid
+from constants import IPFS_CID_VERSION, MINT_MAX_ATTEMPTS
+from mint_queue import MintQueue, FAILED
+
+class FakeIPFS:
+    def __init__(self, failures=0, delay=0):
+        self.failures = failures
+        self.delay = delay
+    
+    def pin_bytes(self, data, filename, content_type):
+        time.sleep(self.delay)
+        if filename == "sketch.png" and self.failures:
+            self.failures -= 1
+            raise ConnectionError("Pinata unreachable")
+        return compute_cid(data, IPFS_CID_VERSION)
+    
+    def submit_pin(self, data, filename, content_type):
+        future = Future()
+        future.set_result(self.pin_bytes(data, filename, content_type))
+        return future
+
+class FakeBlockchain:
+    def __init__(self, receipt_errors=()):
+        self.receipt_errors = list(receipt_errors)
+        self.mints = []
+    
+    def request_nft_mint(self, metadata_uri):
+        self.mints.append(metadata_uri)
+        return "0xabc"
+    
+    def get_vrf_request_id(self, tx_hash):
+        if self.receipt_errors:
+            raise self.receipt_errors.pop(0)
+        return 42
+    
+    def watch_vrf_request(self, request_id):
+        future = Future()
+        future.set_result(7)
+        return future
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(mint_queue, "MINT_RETRY_SECONDS", 0)
+
+def finish(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue._job(job_id)
+        if job["stage"] in ("fulfilled", FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stuck at {job['stage']}")
+
+def run(tmp_path, ipfs, blockchain):
+    changes = []
+    queue = MintQueue(ipfs, blockchain, db_path=str(tmp_path / "jobs.db"),
+                      progress_callback=changes.append, message_callback=lambda message: None)
+    job = finish(queue, queue.submit(np.zeros((8, 8, 3), dtype=np.uint8)))
+    queue.stop()
+    return job, changes
+
+def test_attempts_reset_on_each_stage(tmp_path):
+    job, changes = run(tmp_path, FakeIPFS(failures=MINT_MAX_ATTEMPTS - 1), FakeBlockchain())
+    assert job["stage"] == "fulfilled" and job["token_id"] == 7
+    assert [c["attempts"] for c in changes if c["stage"] == "image_pinned"][0] == 0
+
+def test_sent_mint_survives_outages_beyond_max_attempts(tmp_path):
+    outages = [RuntimeError("Blockchain not connected")] * MINT_MAX_ATTEMPTS + [TimeoutError("not mined")]
+    job, _ = run(tmp_path, FakeIPFS(), FakeBlockchain(outages))
+    assert job["stage"] == "fulfilled" and job["request_id"] == "42"
+
+def test_reverted_mint_fails_at_once(tmp_path):
+    job, _ = run(tmp_path, FakeIPFS(), FakeBlockchain([TransactionReverted("Transaction 0xabc failed")]))
+    assert job["stage"] == FAILED and job["attempts"] == 1
+
+def test_pinning_gives_up_after_max_attempts(tmp_path):
+    job, _ = run(tmp_path, FakeIPFS(failures=MINT_MAX_ATTEMPTS), FakeBlockchain())
+    assert job["stage"] == FAILED and job["tx_hash"] is None
+
+def test_resume_does_not_rerun_a_job_in_flight(tmp_path):
+    blockchain = FakeBlockchain()
+    stages = []
+    queue = MintQueue(FakeIPFS(delay=0.1), blockchain, db_path=str(tmp_path / "jobs.db"),
+                      progress_callback=lambda job: stages.append(job["stage"]),
+                      message_callback=lambda message: None)
+    # A sketch minted while warm-up has not reached the "mint queue" step yet
+    job_id = queue.submit(np.zeros((8, 8, 3), dtype=np.uint8))
+    assert queue.resume() == 1
+    job = finish(queue, job_id)
+    # Give a second worker, if one was started, time to reach the mint
+    time.sleep(0.5)
+    queue.stop()
+    assert job["stage"] == "fulfilled"
+    assert FAILED not in stages
+    assert len(blockchain.mints) == 1
@@ -0,0 +1,55 @@
+import threading
+import time
+import numpy as np
+from pipeline import VideoPipeline
+
+class FakeCapture:
+    def __init__(self, shape=(4, 4, 3)):
+        self.shape = shape
+    
+    def isOpened(self):
+        return True
+    
+    def read(self, out=None):
+        time.sleep(0.005)
+        frame = np.ones(self.shape, dtype=np.uint8)
+        if out is not None:
+            out[...] = frame
+            return True, out
+        return True, frame
+
+def test_stop_waits_for_slow_inference_before_closing_the_ring(monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    started = threading.Event()
+    
+    def slow_inference(frame):
+        started.set()
+        time.sleep(0.5)
+        return frame.sum()
+    
+    pipeline = VideoPipeline(FakeCapture(), slow_inference, workers=2, message_callback=lambda message: None)
+    pipeline.start()
+    assert started.wait(2)
+    ring = pipeline.ring
+    pipeline.stop(timeout=0.05)
+    # A worker is still inside process_fn, so the ring must stay open
+    assert not ring.closed
+    
+    deadline = time.time() + 3
+    while not ring.closed and time.time() < deadline:
+        time.sleep(0.01)
+    assert ring.closed
+    assert pipeline.ring is None
+    assert errors == []
+    assert pipeline.acquire_display() is None
+
+def test_stop_closes_the_ring_when_threads_are_idle():
+    pipeline = VideoPipeline(FakeCapture(), lambda frame: None, message_callback=lambda message: None)
+    pipeline.start()
+    time.sleep(0.05)
+    ring = pipeline.ring
+    pipeline.stop()
+    assert ring.closed
+    ring.release(0)
+    assert ring.mark_done(0) is False
@@ -0,0 +1,83 @@
+import json
+import os
+from types import SimpleNamespace
+import pytest
+from rpc import RpcBatchClient, RpcError, ContractReader
+from standins import JsonRpcStandIn
+
+web3 = pytest.importorskip("web3")
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+NFT_ADDRESS = "0x00000000000000000000000000000000000000a1"
+ETH_FEED = "0x00000000000000000000000000000000000000b1"
+BTC_FEED = "0x00000000000000000000000000000000000000b2"
+ACCOUNT = "0x00000000000000000000000000000000000000c1"
+
+def contracts(w3):
+    from blockchain import BlockchainManager
+    with open(os.path.join(SRC, "nft_contract_abi.json")) as f:
+        nft_abi = json.load(f)
+    feed_abi = BlockchainManager.get_chainlink_abi(None)
+    return (
+        w3.eth.contract(address=w3.to_checksum_address(NFT_ADDRESS), abi=nft_abi),
+        w3.eth.contract(address=w3.to_checksum_address(ETH_FEED), abi=feed_abi),
+        w3.eth.contract(address=w3.to_checksum_address(BTC_FEED), abi=feed_abi),
+    )
+
+def selector(contract, name, *args):
+    return contract.get_function_by_name(name)(*args)._encode_transaction_data()[:10]
+
+def encoded(w3, types, values):
+    return "0x" + w3.codec.encode(types, values).hex()
+
+def test_batch_matches_results_to_calls_by_id():
+    calls = {(NFT_ADDRESS, "0x11111111"): "0x01", (NFT_ADDRESS, "0x22222222"): "0x02"}
+    with JsonRpcStandIn(calls) as node:
+        client = RpcBatchClient(node.url)
+        results = client.batch([
+            ("eth_call", [{"to": NFT_ADDRESS, "data": "0x11111111"}, "latest"]),
+            ("eth_call", [{"to": NFT_ADDRESS, "data": "0x33333333"}, "latest"]),
+            ("eth_call", [{"to": NFT_ADDRESS, "data": "0x22222222"}, "latest"]),
+        ])
+    assert len(node.requests) == 1
+    assert results[0] == "0x01" and results[2] == "0x02"
+    assert isinstance(results[1], RpcError) and results[1].code == -32000
+
+def test_request_raises_rpc_error():
+    with JsonRpcStandIn() as node:
+        with pytest.raises(RpcError):
+            RpcBatchClient(node.url).request("eth_call", [{"to": NFT_ADDRESS, "data": "0x"}, "latest"])
+
+def test_dashboard_state_is_one_round_trip():
+    from blockchain import BlockchainManager
+    w3 = web3.Web3()
+    account = w3.to_checksum_address(ACCOUNT)
+    nft, eth_feed, btc_feed = contracts(w3)
+    round_types = ["uint80", "int256", "uint256", "uint256", "uint80"]
+    calls = {
+        (ETH_FEED, selector(eth_feed, "latestRoundData")): encoded(w3, round_types, [1, 3500 * 10**8, 0, 0, 1]),
+        (BTC_FEED, selector(btc_feed, "latestRoundData")): encoded(w3, round_types, [1, 65000 * 10**8, 0, 0, 1]),
+        (NFT_ADDRESS, selector(nft, "isUserRegistered", account)): encoded(w3, ["bool"], [True]),
+        (NFT_ADDRESS, selector(nft, "getUserFaceHash", account)): encoded(w3, ["string"], ["abc123"]),
+        (NFT_ADDRESS, selector(nft, "getTokenCounter")): encoded(w3, ["uint256"], [7]),
+    }
+    with JsonRpcStandIn(calls) as node:
+        manager = BlockchainManager(connect=False)
+        manager.rpc = RpcBatchClient(node.url)
+        manager.reader = ContractReader(w3, manager.rpc)
+        manager.nft_contract, manager.eth_usd_feed, manager.btc_usd_feed = nft, eth_feed, btc_feed
+        manager.account = SimpleNamespace(address=account)
+        state = manager.get_dashboard_state()
+    
+    assert len(node.requests) == 1
+    assert state == {
+        "eth_usd": 3500.0, "btc_usd": 65000.0, "registered": True, "face_hash": "abc123", "token_counter": 7,
+    }
+
+def test_dashboard_state_reports_failure():
+    from blockchain import BlockchainManager
+    messages = []
+    manager = BlockchainManager(messages.append, connect=False)
+    assert manager.get_dashboard_state() is None
+    assert messages and messages[0].startswith("⚠️ Dashboard refresh failed")
@@ -0,0 +1,57 @@
+import time
+from types import SimpleNamespace
+
+from transactions import PendingTransaction, TransactionSender
+
+class FakeEth:
+    chain_id = 11155111
+    
+    def __init__(self, receipts, mined_nonce):
+        self.receipts = receipts
+        self.mined_nonce = mined_nonce
+    
+    def get_transaction_receipt(self, tx_hash):
+        return self.receipts[tx_hash]
+    
+    def get_transaction_count(self, address, block):
+        return self.mined_nonce
+
+def sender(receipts, mined_nonce):
+    w3 = SimpleNamespace(eth=FakeEth(receipts, mined_nonce))
+    tx_sender = TransactionSender(w3, SimpleNamespace(address="0xUser"), "key")
+    tx_sender.stop()
+    return tx_sender
+
+def track(tx_sender, nonce, *hashes):
+    pending = PendingTransaction(hashes[0], {}, time.time())
+    for tx_hash in hashes[1:]:
+        pending.current_hash = tx_hash
+        pending.hashes.append(tx_hash)
+    tx_sender.pending[nonce] = pending
+    for tx_hash in hashes:
+        tx_sender.by_hash[tx_hash] = pending
+
+def test_forgotten_nonce_drops_every_hash_it_was_sent_under():
+    tx_sender = sender({"0xb": {"status": 1}}, mined_nonce=5)
+    track(tx_sender, 5, "0xa", "0xb")
+    track(tx_sender, 6, "0xc")
+    tx_sender.check_pending()
+    assert list(tx_sender.pending) == [6]
+    assert list(tx_sender.by_hash) == ["0xc"]
+
+def test_waiter_keeps_following_replacements_after_pruning():
+    tx_sender = sender({}, mined_nonce=5)
+    track(tx_sender, 5, "0xa", "0xb")
+    polls = []
+    
+    def receipts(hashes):
+        # check_pending forgets the nonce between the first and second poll
+        polls.append(hashes)
+        if len(polls) == 1:
+            tx_sender.by_hash.clear()
+            return [None] * len(hashes)
+        return [{"status": 1} if tx_hash == "0xb" else None for tx_hash in hashes]
+    
+    tx_sender._receipts = receipts
+    assert tx_sender.wait_for_receipt("0xa", timeout=5, poll=0) == {"status": 1}
+    assert polls[-1] == ["0xa", "0xb"]